@@ -0,0 +1,87 @@
+"""Right-sized copies of the page's images, converted once and served as bytes.
+
+The banner is a 3840px, 1 MB PNG; decoding and shrinking it on every run
+costs more than the rest of the page header. Each (image, width, format)
+variant is written once to ASSET_DIR, named after a hash of the source so
+an edited image gets new variants, and then kept in memory.
+
+    python assets.py    # pre-build every variant, e.g. while building the image
+
+PNG variants are what the Streamlit page uses: st.image passes PNG bytes
+at or under its content width through untouched, but re-encodes any other
+format. The WebP variants are for plain HTML (see the static export).
+"""
+import hashlib
+import os
+import sys
+import threading
+
+import atomic
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+ASSET_DIR = os.environ.get('ASSET_DIR', os.path.join(ROOT, '.assets'))
+
+BANNER = 'Images/OSMO-blockchain.png'
+ICON = 'Images/osmo-logo.png'
+
+# path -> widths the page shows it at. 1460px is Streamlit's widest content
+# column; the icon is only ever a favicon.
+VARIANTS = {
+    BANNER: (1460,),
+    ICON: (64,),
+}
+FORMATS = ('PNG', 'WEBP')
+
+_images = {}   # (path, width, fmt) -> bytes
+_lock = threading.Lock()
+
+
+def variant_path(path, width, fmt='PNG'):
+    with open(os.path.join(ROOT, path), 'rb') as f:
+        digest = hashlib.sha1(f.read()).hexdigest()[:12]
+    stem = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(ASSET_DIR, f'{stem}.{digest}.{width}w.{fmt.lower()}')
+
+
+def build(path, width, fmt='PNG'):
+    """Write the `width`-pixel `fmt` variant of `path` unless it exists; returns its path."""
+    dest = variant_path(path, width, fmt)
+    if os.path.exists(dest):
+        return dest
+    from PIL import Image  # only needed when a variant is missing
+
+    img = Image.open(os.path.join(ROOT, path))
+    if img.width > width:
+        img = img.resize((width, round(img.height * width / img.width)), Image.LANCZOS)
+    with atomic.replacing(dest) as tmp:
+        if fmt == 'WEBP':
+            img.save(tmp, 'WEBP', quality=85, method=6)
+        else:
+            img.save(tmp, 'PNG', optimize=True)
+    return dest
+
+
+def image(path, width, fmt='PNG'):
+    """Bytes of the `width`-pixel `fmt` variant of `path`, building it on first use."""
+    key = (path, width, fmt)
+    data = _images.get(key)
+    if data is None:
+        with _lock:
+            data = _images.get(key)
+            if data is None:
+                with open(build(path, width, fmt), 'rb') as f:
+                    data = _images[key] = f.read()
+    return data
+
+
+def main():
+    for path, widths in VARIANTS.items():
+        for width in widths:
+            for fmt in FORMATS:
+                dest = build(path, width, fmt)
+                print(f'{path} -> {os.path.relpath(dest, ROOT)} ({os.path.getsize(dest) / 1e3:,.0f} kB)')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,32 @@
+"""Replace files atomically, so readers only ever see the whole old or the whole new file."""
+import contextlib
+import os
+import tempfile
+
+
+@contextlib.contextmanager
+def replacing(dest, mode=0o644):
+    """Yields a temporary path beside `dest`; once the block finishes, that file replaces `dest`.
+
+    mkstemp creates files 0600, which would hide them from a web server or
+    node_exporter running as another user, so they get `mode` first.
+    """
+    directory = os.path.dirname(os.path.abspath(dest))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp = tempfile.mkstemp(dir=directory, suffix='.tmp')
+    os.close(fd)
+    try:
+        yield tmp
+        os.chmod(tmp, mode)
+        os.replace(tmp, dest)
+    except BaseException:
+        with contextlib.suppress(FileNotFoundError):
+            os.unlink(tmp)
+        raise
+
+
+def write(dest, data, mode=0o644):
+    """Atomically replace `dest` with `data` (str or bytes)."""
+    with replacing(dest, mode) as tmp:
+        with open(tmp, 'wb') as f:
+            f.write(data.encode() if isinstance(data, str) else data)
@@ -0,0 +1,78 @@
+"""Import-time budget for a cold start of home.py.
+
+Imports the page's modules in a fresh interpreter, the way its first run
+does (Streamlit itself is already loaded by the server), and fails if
+
+- the modules imported before the page header paints pull in anything
+  heavy, or take longer than HEADER_BUDGET seconds;
+- the whole page takes longer than PAGE_BUDGET seconds to import, or
+  imports Plotly or Pillow, which are left to the first chart and the
+  first missing image variant.
+
+    python bench/import_budget.py [--repeat 5]
+
+Times are the best of --repeat runs, so a noisy machine doesn't fail it.
+"""
+import argparse
+import json
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+HEADER = ['assets', 'metrics']
+PAGE = HEADER + ['downsample', 'figures', 'scheduler', 'schema', 'sections']
+HEAVY = ['pandas', 'numpy', 'pyarrow', 'requests', 'plotly', 'PIL']
+DEFERRED = ['plotly', 'PIL']
+
+HEADER_BUDGET = float(os.environ.get('HEADER_IMPORT_BUDGET', 0.05))
+PAGE_BUDGET = float(os.environ.get('PAGE_IMPORT_BUDGET', 1.5))
+
+PROBE = '''
+import json, sys, time
+import streamlit
+before = set(sys.modules)
+out = {}
+for step, modules in json.loads(sys.argv[1]):
+    start = time.perf_counter()
+    for name in modules:
+        __import__(name)
+    out[step] = time.perf_counter() - start, sorted({m.split('.')[0] for m in set(sys.modules) - before})
+print(json.dumps(out))
+'''
+
+
+def probe():
+    steps = [('header', HEADER), ('page', PAGE[len(HEADER):])]
+    out = subprocess.run([sys.executable, '-c', PROBE, json.dumps(steps)], cwd=ROOT, check=True,
+                         capture_output=True, text=True).stdout
+    return json.loads(out)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check home.py's cold-start import time.")
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args(argv)
+
+    runs = [probe() for _ in range(args.repeat)]
+    header = min(run['header'][0] for run in runs)
+    page = header + min(run['page'][0] for run in runs)
+    header_loaded, page_loaded = runs[0]['header'][1], runs[0]['page'][1]
+    print(f'header imports: {header * 1000:.0f} ms (budget {HEADER_BUDGET * 1000:.0f} ms)')
+    print(f'page imports:   {page * 1000:.0f} ms (budget {PAGE_BUDGET * 1000:.0f} ms)')
+
+    failures = []
+    if header > HEADER_BUDGET:
+        failures.append('header imports over budget')
+    if page > PAGE_BUDGET:
+        failures.append('page imports over budget')
+    failures += [f'{m} imported before the header paints' for m in HEAVY if m in header_loaded]
+    failures += [f'{m} imported at page start' for m in DEFERRED if m in page_loaded]
+    for failure in failures:
+        print('FAIL:', failure)
+    return 1 if failures else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""End-to-end render benchmark for home.py.
+
+Renders the whole page headlessly with Streamlit's AppTest against the
+local Flipside stand-in (bench/server.py) and reports, per section, where
+the time goes: fetch, bytes, JSON parse, figure build, figure
+serialization and growth of the process's peak RSS.
+
+    python bench/render.py                           # 1x, one session
+    python bench/render.py --scale 1 10 100 --sessions 1 8 --latency 0.1
+
+Every scenario starts cold (empty caches and snapshot dir) and is then
+rendered again warm. A "render" opens every lazy section and visits both
+tabs.
+"""
+import argparse
+import collections
+import logging
+import os
+import resource
+import sys
+import tempfile
+import threading
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+sys.path.insert(0, os.path.join(ROOT, 'bench'))
+
+import plotly.io  # noqa: E402
+from streamlit.runtime.scriptrunner.script_cache import ScriptCache  # noqa: E402
+from streamlit.testing.v1 import AppTest  # noqa: E402
+
+import figures  # noqa: E402
+import flipside  # noqa: E402
+import scheduler  # noqa: E402
+import schema  # noqa: E402
+import sections  # noqa: E402
+import server  # noqa: E402
+
+PAGE = os.path.join(ROOT, 'home.py')
+COLUMNS = ('wall', 'fetch', 'bytes', 'parse', 'build', 'serialize', 'rss')
+
+
+class Recorder:
+    """Per-section totals, filled in by wrappers around the page's hot paths."""
+
+    def __init__(self):
+        self.lock = threading.Lock()
+        self.totals = collections.defaultdict(lambda: dict.fromkeys(COLUMNS, 0))
+        self.owner = {}                   # dataset name -> first section that declared it
+        self.local = threading.local()    # section being rendered on this thread
+
+    def add(self, section, **values):
+        with self.lock:
+            row = self.totals[section or '(page)']
+            for k, v in values.items():
+                row[k] += v
+
+    def section(self):
+        return getattr(self.local, 'section', None)
+
+    def reset(self):
+        self.totals.clear()
+
+
+def instrument(rec):
+    """Wrap fetch, parse, figure build and serialization to report into `rec`."""
+    fetch, parse, figure, to_json, render = (flipside.fetch, schema.parse, figures.figure,
+                                             plotly.io.to_json, sections.render)
+
+    def timed_fetch(query_id):
+        start = time.perf_counter()
+        df = fetch(query_id)
+        rec.add(rec.owner.get(flipside.NAMES[query_id]), fetch=time.perf_counter() - start,
+                bytes=df.attrs.get('bytes', 0))
+        return df
+
+    def timed_parse(name, text):
+        start = time.perf_counter()
+        df = parse(name, text)
+        rec.add(rec.owner.get(name), parse=time.perf_counter() - start)
+        return df
+
+    def timed_figure(spec, df, build, name=None):
+        def timed_build(df):
+            start = time.perf_counter()
+            fig = build(df)
+            rec.add(rec.section(), build=time.perf_counter() - start)
+            return fig
+        return figure(spec, df, timed_build, name)
+
+    def timed_to_json(*args, **kwargs):
+        start = time.perf_counter()
+        out = to_json(*args, **kwargs)
+        rec.add(rec.section(), serialize=time.perf_counter() - start)
+        return out
+
+    def timed_render(body, datasets, *args, **kwargs):
+        name = body.__name__
+        for dataset in datasets:
+            rec.owner.setdefault(dataset, name)
+        rec.local.section = name
+        rss = peak_rss()
+        start = time.perf_counter()
+        try:
+            return render(body, datasets, *args, **kwargs)
+        finally:
+            rec.add(name, wall=time.perf_counter() - start, rss=peak_rss() - rss)
+            rec.local.section = None
+
+    flipside.fetch, schema.parse, figures.figure = timed_fetch, timed_parse, timed_figure
+    plotly.io.to_json, sections.render = timed_to_json, timed_render
+
+
+def peak_rss():
+    """Peak RSS of this process so far, in MB."""
+    return resource.getrusage(resource.RUSAGE_SELF).ru_maxrss / 1024
+
+
+def share_bytecode():
+    """Compile home.py once per process, not once per run.
+
+    AppTest compiles the script afresh in a new ScriptCache on every run,
+    and concurrent compiles trip CPython 3.11 ("SystemError: AST
+    constructor recursion depth mismatch"). Sharing one code object, built
+    under a lock, keeps concurrent sessions to running the page.
+    """
+    get_bytecode = ScriptCache.get_bytecode
+    lock, code = threading.Lock(), {}
+
+    def shared(self, script_path):
+        script_path = os.path.abspath(script_path)
+        with lock:
+            if script_path not in code:
+                code[script_path] = get_bytecode(self, script_path)
+            return code[script_path]
+
+    ScriptCache.get_bytecode = shared
+
+
+def checked(at):
+    """`at` after a run, or the page's exception if the run raised one."""
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return at
+
+
+def render_page():
+    """One viewer's full visit: first paint, every lazy section, both tabs."""
+    at = checked(AppTest.from_file(PAGE, default_timeout=600).run())
+    while at.button:
+        checked(at.button[0].click().run())
+    checked(at.radio(key='balance-tab').set_value('Staking').run())
+
+
+def render_sessions(n):
+    """`n` concurrent viewers; returns wall time of the slowest."""
+    errors = []
+
+    def one():
+        try:
+            render_page()
+        except Exception as exc:
+            errors.append(exc)
+
+    threads = [threading.Thread(target=one) for _ in range(n)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    if errors:
+        raise errors[0]
+    return time.perf_counter() - start
+
+
+def reset_caches(snapshot_dir):
+    flipside._cache.invalidate()
+    figures._figures.clear()
+    flipside.snapshots.SNAPSHOT_DIR = snapshot_dir
+
+
+def report(title, rec, wall, stand_in):
+    print(f'\n{title}: {wall:.2f}s wall, {stand_in.requests} upstream requests, '
+          f'{stand_in.bytes_sent / 1e3:,.0f} kB sent (gzip), peak RSS {peak_rss():.0f} MB')
+    fmt = '  {:<14} {:>8} {:>8} {:>10} {:>8} {:>8} {:>10} {:>8}'
+    print(fmt.format('section', 'wall s', 'fetch s', 'bytes', 'parse s', 'build s', 'serial. s', '+RSS MB'))
+    for section, row in sorted(rec.totals.items()):
+        print(fmt.format(section, f"{row['wall']:.3f}", f"{row['fetch']:.3f}", f"{row['bytes']:,}",
+                         f"{row['parse']:.3f}", f"{row['build']:.3f}", f"{row['serialize']:.3f}",
+                         f"{row['rss']:.1f}"))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark a full render of home.py.')
+    parser.add_argument('--scale', type=int, nargs='+', default=[1], help='row multipliers for the daily series')
+    parser.add_argument('--sessions', type=int, nargs='+', default=[1], help='concurrent viewers')
+    parser.add_argument('--latency', type=float, default=0.0, help='stand-in response latency in seconds')
+    parser.add_argument('--data', help='directory of recorded <uuid>.json results (see bench/server.py)')
+    args = parser.parse_args(argv)
+
+    # Streamlit logs a deprecation notice per chart per run, and a bare-mode
+    # notice per session thread; keep the report readable.
+    for name in ('streamlit.deprecation_util', 'streamlit.runtime.scriptrunner_utils.script_run_context'):
+        logging.getLogger(name).disabled = True
+    scheduler.MODE = 'off'
+    rec = Recorder()
+    instrument(rec)
+    share_bytecode()
+    ScriptCache().get_bytecode(PAGE)  # compile serially, before any session thread starts
+    for scale in args.scale:
+        stand_in = server.StandIn(server.fixtures(args.data, scale), latency=args.latency).start()
+        flipside.API_URL = stand_in.url
+        try:
+            for sessions in args.sessions:
+                with tempfile.TemporaryDirectory() as snapshot_dir:
+                    reset_caches(snapshot_dir)
+                    for phase in ('cold', 'warm'):
+                        rec.reset()
+                        stand_in.requests = stand_in.bytes_sent = 0
+                        wall = render_sessions(sessions)
+                        report(f'scale {scale}x, {sessions} session(s), {phase}', rec, wall, stand_in)
+        finally:
+            stand_in.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,165 @@
+"""Local stand-in for the Flipside query API.
+
+Replays a recorded JSON result for every query UUID the page uses, with
+configurable latency and row count, for benchmarks and offline staging:
+
+    python bench/server.py [--port 8765] [--data DIR] [--latency 0.2] [--scale 10]
+    python bench/server.py --record DIR     # save the live results into DIR
+
+then point the app at it with
+FLIPSIDE_API_URL=http://127.0.0.1:8765/api/v2/queries/{}/data/latest.
+Queries with no recording in DIR are served synthetic results computed by
+engine.py from a small synthetic extract.
+"""
+import argparse
+import gzip
+import hashlib
+import os
+import re
+import sys
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import pandas as pd
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import engine  # noqa: E402
+import flipside  # noqa: E402
+import incremental  # noqa: E402
+import schema  # noqa: E402
+import synthetic  # noqa: E402
+
+PATH = re.compile(r'/api/v2/queries/([0-9a-f-]+)/data/latest')
+
+
+def fixtures(data_dir=None, scale=1):
+    """dict of query UUID -> JSON body.
+
+    With `scale` > 1 the daily series are extended back in time to `scale`
+    times as many days, to see how the page copes as history grows.
+    """
+    bodies = {}
+    synth = None
+    for name, query_id in flipside.QUERIES.items():
+        path = os.path.join(data_dir, query_id + '.json') if data_dir else None
+        if path and os.path.exists(path):
+            with open(path) as f:
+                text = f.read()
+            if scale == 1:
+                bodies[query_id] = text.encode()
+                continue
+            df = schema.parse(name, text)
+        else:
+            if synth is None:
+                synth = engine.Engine(*synthetic.generate(wallets=5000, days=500))
+            df = synth.dataset(name)
+        if scale > 1 and name in incremental.SERIES:
+            date = incremental.SERIES[name][0]
+            span = df[date].max() - df[date].min() + pd.Timedelta(days=1)
+            df = pd.concat([df.assign(**{date: df[date] - span * i}) for i in range(scale - 1, -1, -1)],
+                           ignore_index=True)
+        bodies[query_id] = df.to_json(orient='records', date_format='iso').encode()
+    return bodies
+
+
+class StandIn:
+    """The stand-in server, run on a background thread."""
+
+    def __init__(self, bodies, port=0, latency=0.0):
+        self.latency = latency
+        self.requests = 0
+        self.bytes_sent = 0
+        self.bodies = {qid: (body, gzip.compress(body), '"%s"' % hashlib.sha1(body).hexdigest())
+                       for qid, body in bodies.items()}
+        self.httpd = ThreadingHTTPServer(('127.0.0.1', port), self._handler())
+        self.httpd.daemon_threads = True
+        self.thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+
+    @property
+    def url(self):
+        host, port = self.httpd.server_address[:2]
+        return f'http://{host}:{port}/api/v2/queries/{{}}/data/latest'
+
+    def start(self):
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def _handler(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = 'HTTP/1.1'
+
+            def do_GET(self):
+                server.requests += 1
+                if server.latency:
+                    time.sleep(server.latency)
+                m = PATH.fullmatch(self.path)
+                if not m or m.group(1) not in server.bodies:
+                    self.send_response(404)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                body, gzipped, etag = server.bodies[m.group(1)]
+                if self.headers.get('If-None-Match') == etag:
+                    self.send_response(304)
+                    self.send_header('ETag', etag)
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return
+                if 'gzip' in self.headers.get('Accept-Encoding', ''):
+                    body = gzipped
+                self.send_response(200)
+                self.send_header('Content-Type', 'application/json')
+                self.send_header('ETag', etag)
+                if body is gzipped:
+                    self.send_header('Content-Encoding', 'gzip')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+                server.bytes_sent += len(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+
+def record(data_dir):
+    os.makedirs(data_dir, exist_ok=True)
+    for name, query_id in flipside.QUERIES.items():
+        resp = flipside.session().get(flipside.API_URL.format(query_id), timeout=flipside.TIMEOUT)
+        resp.raise_for_status()
+        with open(os.path.join(data_dir, query_id + '.json'), 'wb') as f:
+            f.write(resp.content)
+        print(f'{name:<28} {len(resp.content):>10,} bytes')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Serve recorded Flipside query results locally.')
+    parser.add_argument('--port', type=int, default=8765)
+    parser.add_argument('--data', help='directory of <uuid>.json recordings')
+    parser.add_argument('--latency', type=float, default=0.0, help='seconds added to every response')
+    parser.add_argument('--scale', type=int, default=1, help='multiply the rows of the daily series')
+    parser.add_argument('--record', metavar='DIR', help='save the live results into DIR and exit')
+    args = parser.parse_args(argv)
+    if args.record:
+        record(args.record)
+        return 0
+    server = StandIn(fixtures(args.data, args.scale), args.port, args.latency).start()
+    print(f'serving on {server.url}')
+    try:
+        server.thread.join()
+    except KeyboardInterrupt:
+        server.stop()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,78 @@
+import threading
+import time
+from concurrent.futures import Future
+
+
+class TTLCache:
+    """Process-wide cache with single-flight loads and stale-while-revalidate.
+
+    A miss blocks on one shared in-flight load per key, however many callers
+    ask for it at once. Once an entry is older than `ttl` seconds it is still
+    returned straight away while a single background thread refreshes it.
+
+    `timestamp`, if given, maps a loaded value to the time its data was
+    actually fetched (e.g. when it came from an older on-disk snapshot);
+    otherwise values are stamped with the time they were loaded.
+    """
+
+    def __init__(self, ttl, timestamp=None):
+        self.ttl = ttl
+        self.timestamp = timestamp
+        self._lock = threading.Lock()
+        self._entries = {}   # key -> (value, fetched_at)
+        self._inflight = {}  # key -> Future
+
+    def get(self, key, loader):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                value, fetched_at = entry
+                if time.time() - fetched_at >= self.ttl and key not in self._inflight:
+                    self._inflight[key] = Future()
+                    threading.Thread(target=self._load, args=(key, loader), daemon=True).start()
+                return value
+            future, owner = self._claim(key)
+        if owner:
+            self._load(key, loader)
+        return future.result()
+
+    def refresh(self, key, loader):
+        """Load `key` now, joining an in-flight load of it if there is one."""
+        with self._lock:
+            future, owner = self._claim(key)
+        if owner:
+            self._load(key, loader)
+        return future.result()
+
+    def invalidate(self, key=None):
+        with self._lock:
+            if key is None:
+                self._entries.clear()
+            else:
+                self._entries.pop(key, None)
+
+    def _claim(self, key):
+        # Caller holds the lock. Returns the in-flight future for `key` and
+        # whether this caller created it and so has to run the load.
+        future = self._inflight.get(key)
+        if future is not None:
+            return future, False
+        future = self._inflight[key] = Future()
+        return future, True
+
+    def _load(self, key, loader):
+        future = self._inflight[key]
+        try:
+            value = loader()
+        except BaseException as exc:
+            # A failed background refresh keeps serving the stale value;
+            # the next get() after this will try again.
+            with self._lock:
+                del self._inflight[key]
+            future.set_exception(exc)
+            return
+        fetched_at = self.timestamp(value) if self.timestamp else None
+        with self._lock:
+            self._entries[key] = (value, time.time() if fetched_at is None else fetched_at)
+            del self._inflight[key]
+        future.set_result(value)
@@ -0,0 +1,69 @@
+import os
+
+import numpy as np
+import pandas as pd
+
+# Most points any one trace of a daily chart sends to the browser.
+MAX_POINTS = int(os.environ.get('CHART_MAX_POINTS', 1000))
+
+
+def minmax_mask(y, groups=None, max_points=MAX_POINTS):
+    """Rows to keep so no group has more than about `max_points` points.
+
+    Rows must already be in x order within each group. Each group that is over
+    budget is cut into about max_points/2 equal-count buckets and keeps the minimum
+    and maximum of every bucket plus its own first and last point, so one-day
+    spikes survive however far the series is thinned. Smaller groups are kept
+    whole. Vectorized across all groups at once.
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n <= max_points:
+        return np.ones(n, dtype=bool)
+    codes = np.zeros(n, dtype=np.int64) if groups is None else pd.factorize(groups)[0].astype(np.int64)
+    sizes = np.bincount(codes)
+    size = sizes[codes]
+    # Position of each row within its group, in the existing (x) order.
+    by_group = np.argsort(codes, kind='stable')
+    starts = np.concatenate(([0], np.cumsum(sizes)[:-1]))
+    pos = np.empty(n, dtype=np.int64)
+    pos[by_group] = np.arange(n) - np.repeat(starts, sizes)
+
+    buckets = max((max_points - 2) // 2, 1)
+    bucket = pos * buckets // size
+    order = np.lexsort((y, bucket, codes))
+    key = codes[order] * buckets + bucket[order]
+    edge = np.empty(n, dtype=bool)
+    edge[0] = True
+    np.not_equal(key[1:], key[:-1], out=edge[1:])
+    keep = np.zeros(n, dtype=bool)
+    keep[order[edge]] = True                          # bucket minimum
+    keep[order[np.roll(edge, -1)]] = True             # bucket maximum
+    keep |= (pos == 0) | (pos == size - 1) | (size <= max_points)
+    return keep
+
+
+def downsample(df, x, y, by=None, max_points=MAX_POINTS, stacked=False):
+    """`df` sorted by `x` and thinned to about `max_points` points per trace.
+
+    `y` is one column or a list of columns (one trace each, as in px.area with
+    y=[...]); `by` is the column that splits rows into traces (px `color`).
+
+    Set `stacked` when the `by` traces are stacked (px.area). Plotly fills
+    a date missing from one trace with zero, so every trace then keeps the
+    union of the dates any of them selected, each picking from a
+    proportionally smaller budget.
+    """
+    ys = [y] if isinstance(y, str) else list(y)
+    df = df.sort_values(x, kind='stable')
+    groups = None if by is None else df[by].to_numpy()
+    budget = max(max_points // len(ys), 2)
+    aligned = stacked and by is not None
+    if aligned:
+        budget = max(budget // max(df[by].nunique(), 1), 2)
+    keep = np.zeros(len(df), dtype=bool)
+    for col in ys:
+        keep |= minmax_mask(df[col].to_numpy(), groups, budget)
+    if aligned:
+        keep = df[x].isin(df[x][keep]).to_numpy()
+    return df[keep]
@@ -0,0 +1,223 @@
+"""Compute every dataset on the page locally from two raw extracts.
+
+Instead of ~15 pre-aggregated Flipside queries, load one extract of
+osmosis.core.fact_daily_balances and one of osmosis.core.ez_prices and
+derive each dataset here with vectorized NumPy groupbys. The results have
+the same names and columns as the queries in flipside.QUERIES, so the page
+can't tell the difference.
+
+Expected columns:
+    balances  DATE, ADDRESS, BALANCE_TYPE, CURRENCY, BALANCE
+    prices    DATE, CURRENCY, PROJECT_NAME, PRICE
+
+Set ENGINE_EXTRACT_DIR to a directory holding balances.parquet and
+prices.parquet (see synthetic.py for test data) to serve the page from it.
+"""
+import functools
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import schema
+
+EXTRACT_DIR = os.environ.get('ENGINE_EXTRACT_DIR')
+
+BALANCE_TYPES = ['liquid', 'locked liquidity', 'staked', 'superfluid staked']
+OSMO = 'uosmo'
+TOP = 10
+
+_engine = None
+_engine_mtime = None
+_engine_lock = threading.Lock()
+
+
+def _codes(values, categories=None):
+    """Integer codes and sorted uniques for a column."""
+    if categories is not None:
+        cat = pd.Categorical(values, categories=categories)
+        return cat.codes.astype(np.int64), np.asarray(categories)
+    codes, uniques = pd.factorize(values, sort=True)
+    return codes.astype(np.int64), np.asarray(uniques)
+
+
+class Engine:
+    def __init__(self, balances, prices):
+        d, self.dates = _codes(balances['DATE'])
+        a, self.addresses = _codes(balances['ADDRESS'])
+        t, self.types = _codes(balances['BALANCE_TYPE'], BALANCE_TYPES)
+        c, self.currencies = _codes(balances['CURRENCY'])
+        # Rows ordered by (date, address, type), so all rows of one wallet on
+        # one day are adjacent and per-day distinct counts need no sorting.
+        order = np.argsort((d * len(self.addresses) + a) * len(self.types) + t, kind='stable')
+        self.d, self.a, self.t, self.c = d[order], a[order], t[order], c[order]
+        self.amount = balances['BALANCE'].to_numpy(dtype=np.float64)[order]
+
+        # Dense (date, currency) price table, so the price join is one gather.
+        pd_, pc = prices['DATE'].to_numpy(), prices['CURRENCY'].to_numpy()
+        di = pd.Index(self.dates).get_indexer(pd_)
+        ci = pd.Index(self.currencies).get_indexer(pc)
+        ok = (di >= 0) & (ci >= 0)
+        price = np.zeros((len(self.dates), len(self.currencies)))
+        price[di[ok], ci[ok]] = prices['PRICE'].to_numpy(dtype=np.float64)[ok]
+        self.usd = self.amount * price[self.d, self.c]
+
+        names = prices.drop_duplicates('CURRENCY').set_index('CURRENCY')['PROJECT_NAME']
+        self.project = names.reindex(self.currencies).fillna(pd.Series(self.currencies, index=self.currencies)).to_numpy()
+        self.latest = self.d == len(self.dates) - 1
+        self.is_osmo = np.isin(self.c, np.flatnonzero(self.currencies == OSMO))
+
+    # -- vectorized building blocks ---------------------------------------
+
+    def _sum(self, key, size, values, mask=None):
+        if mask is not None:
+            key, values = key[mask], values[mask]
+        return np.bincount(key, weights=values, minlength=size)
+
+    def _distinct(self, key, size, mask=None):
+        """Number of distinct addresses per key value."""
+        a = self.a
+        if mask is not None:
+            key, a = key[mask], a[mask]
+        n = len(self.addresses)
+        if size * n <= 1 << 26:
+            # Small enough for a dense seen-table, which beats sorting.
+            seen = np.zeros(size * n, dtype=bool)
+            seen[key * n + a] = True
+            return seen.reshape(size, n).sum(axis=1)
+        pairs = np.unique(key * n + a)
+        return np.bincount(pairs // n, minlength=size)
+
+    def _distinct_daily(self, key, size, mask=None):
+        """`_distinct` for keys made of the date and balance type (or just the
+        date): repeats of a (key, address) pair are adjacent in row order, so a
+        single pass finds them."""
+        a = self.a
+        if mask is not None:
+            key, a = key[mask], a[mask]
+        first = np.ones(len(key), dtype=bool)
+        first[1:] = (key[1:] != key[:-1]) | (a[1:] != a[:-1])
+        return np.bincount(key[first], minlength=size)
+
+    def _top(self, labels, values, label, value):
+        top = np.argsort(values)[::-1][:TOP]
+        top = top[values[top] > 0]
+        return pd.DataFrame({label: np.asarray(labels)[top], value: values[top]})
+
+    def _by_date_type(self, values, value, types=BALANCE_TYPES, mask=None):
+        nt = len(self.types)
+        out = values(self.d * nt + self.t, len(self.dates) * nt, mask)
+        df = pd.DataFrame({
+            'DATE': np.repeat(self.dates, nt),
+            'BALANCE_TYPE': np.tile(self.types, len(self.dates)),
+            value: out,
+        })
+        return df[df['BALANCE_TYPE'].isin(types) & (df[value] > 0)].reset_index(drop=True)
+
+    # -- the page's datasets ----------------------------------------------
+
+    def active_wallets(self):
+        return pd.DataFrame({'BALANCE_TYPE': self.types,
+                             'NO_OF_WALLETS': self._distinct(self.t, len(self.types))})
+
+    def wallets_over_time(self):
+        return self._by_date_type(self._distinct_daily, 'NO_OF_WALLETS')
+
+    def balance(self):
+        return pd.DataFrame({'BALANCE_TYPE': self.types,
+                             'BALANCE_USD': self._sum(self.t, len(self.types), self.usd)})
+
+    def balance_usd(self):
+        df = self._by_date_type(lambda k, n, m: self._sum(k, n, self.usd, m), 'BALANCE_USD')
+        return df.rename(columns={'DATE': 'DAY'})
+
+    def _top_wallets(self, balance_type, values, value):
+        mask = self.latest & (self.t == BALANCE_TYPES.index(balance_type))
+        return self._top(self.addresses, self._sum(self.a, len(self.addresses), values, mask), 'ADDRESS', value)
+
+    def top_wallets_liquid(self):
+        return self._top_wallets('liquid', self.usd, 'BALANCE_USD')
+
+    def top_wallets_locked_liquid(self):
+        # LP shares have no USD price; these are ranked by share balance.
+        return self._top_wallets('locked liquidity', self.amount, 'BALANCE')
+
+    def top_wallets_staked(self):
+        return self._top_wallets('staked', self.usd, 'BALANCE_USD')
+
+    def top_wallets_superfluid(self):
+        return self._top_wallets('superfluid staked', self.amount, 'BALANCE')
+
+    def osmo_balance_usd(self):
+        out = self._sum(self.t, len(self.types), self.usd, self.is_osmo)
+        df = pd.DataFrame({'BALANCE_TYPE': self.types, 'BALANCE_USD': out})
+        return df[df['BALANCE_USD'] > 0].reset_index(drop=True)
+
+    def osmo_balance_usd_time(self):
+        return self._by_date_type(lambda k, n, m: self._sum(k, n, self.usd, m), 'BALANCE_USD',
+                                  mask=self.is_osmo)
+
+    @functools.cached_property
+    def _osmo_per_day(self):
+        wallets = self._distinct_daily(self.d, len(self.dates), self.is_osmo)
+        usd = self._sum(self.d, len(self.dates), self.usd, self.is_osmo)
+        return wallets, usd
+
+    def osmo_wallets(self):
+        wallets, usd = self._osmo_per_day
+        total_wallets, total = wallets[-1], usd[-1]
+        return pd.DataFrame({'TOTAL_WALLETS': [total_wallets], 'TOTAL_OSMO_BALANCE': [total],
+                             'AVG_OSMO_PER_WALLET': [total / total_wallets if total_wallets else 0.0]})
+
+    def avg_osmo_per_wallet(self):
+        wallets, usd = self._osmo_per_day
+        return pd.DataFrame({'DATE': self.dates, 'TOTAL_WALLETS': wallets,
+                             'AVG_OSMO_PER_WALLET': np.divide(usd, wallets, out=np.zeros(len(usd)), where=wallets > 0)})
+
+    def holding_osmo_other(self):
+        n = len(self.dates)
+        out = {}
+        for column, mask in (('AVG_BALANCE_OSMO', self.is_osmo), ('AVG_BALANCE_OTHER', ~self.is_osmo)):
+            usd = self._sum(self.d, n, self.usd, mask)
+            wallets = self._distinct_daily(self.d, n, mask)
+            out[column] = np.divide(usd, wallets, out=np.zeros(n), where=wallets > 0)
+        return pd.DataFrame({'DATE': self.dates, **out})
+
+    def top_tokens_wallets(self):
+        wallets = self._distinct(self.c, len(self.currencies), self.latest)
+        return self._top(self.project, wallets, 'PROJECT_NAME', 'WALLETS')
+
+    def top_tokens_balance(self):
+        usd = self._sum(self.c, len(self.currencies), self.usd, self.latest)
+        return self._top(self.project, usd, 'PROJECT_NAME', 'BALANCE_USD')
+
+    def _top_pools(self, balance_type):
+        # Pool shares are denominated in gamm/pool/<id>.
+        pool = pd.Series(self.currencies).str.extract(r'^gamm/pool/(\d+)$')[0]
+        is_pool = pool.notna().to_numpy()
+        mask = self.latest & (self.t == BALANCE_TYPES.index(balance_type)) & is_pool[self.c]
+        totals = self._sum(self.c, len(self.currencies), self.amount, mask)
+        return self._top(pool.fillna(-1).astype(int).to_numpy(), totals, 'POOL_ID', 'BALANCE')
+
+    def top_pools_locked_liquid(self):
+        return self._top_pools('locked liquidity')
+
+    def top_pools_superfluid_staked(self):
+        return self._top_pools('superfluid staked')
+
+    def dataset(self, name):
+        """The dataset the page knows as `name`, typed like a Flipside result."""
+        return schema.apply(name, getattr(self, name)())
+
+
+def get():
+    """The engine over ENGINE_EXTRACT_DIR, rebuilt when the extract changes."""
+    global _engine, _engine_mtime
+    paths = [os.path.join(EXTRACT_DIR, f) for f in ('balances.parquet', 'prices.parquet')]
+    mtime = max(os.path.getmtime(p) for p in paths)
+    with _engine_lock:
+        if _engine is None or mtime != _engine_mtime:
+            _engine = Engine(*(pd.read_parquet(p) for p in paths))
+            _engine_mtime = mtime
+        return _engine
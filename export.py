@@ -0,0 +1,316 @@
+"""Pre-render the whole dashboard to a static HTML bundle.
+
+Runs home.py headlessly, opens every lazy section and both tabs, and turns
+what it drew into plain HTML: headings, narrative markdown, metrics and
+every Plotly figure, drawn client-side by one shared copy of Plotly.js.
+
+    python export.py OUT_DIR
+
+writes OUT_DIR/index.html plus the Plotly.js bundle and images beside it,
+ready for any static web server or CDN. The data comes from the same
+cache and snapshots the app uses, so run it after a refresh; with
+FLIPSIDE_EXPORT_DIR set the scheduler does that by itself. Asset names
+carry a version or content hash, and index.html is replaced last and
+atomically, so a bundle being served is never half-written.
+
+Widgets that only make sense live (the date range and the performance
+panel in the sidebar) are left out; charts show the default date range.
+"""
+import argparse
+import datetime as dt
+import hashlib
+import html
+import json
+import os
+import re
+import sys
+
+import atomic
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+PAGE = os.path.join(ROOT, 'home.py')
+TAB_KEY = 'balance-tab'
+
+CSS = '''
+body { margin: 0; font-family: "Source Sans Pro", system-ui, sans-serif; color: #31333f; line-height: 1.6; }
+main { max-width: 1460px; margin: 0 auto; padding: 3rem 1rem 5rem; }
+img { max-width: 100%; height: auto; }
+a { color: #0068c9; }
+.row { display: flex; flex-wrap: wrap; gap: 1rem; }
+.row > div { min-width: 0; }
+.info { background: #1c83e11a; color: #004280; border-radius: .5rem; padding: 1rem; }
+.metric .label { font-size: .875rem; }
+.metric .value { font-size: 2.25rem; }
+.chart { min-height: 450px; }
+details { border: 1px solid #31333f33; border-radius: .5rem; padding: .5rem 1rem; margin: 1rem 0; }
+.tabs button { font: inherit; background: none; border: 0; border-bottom: 2px solid transparent; padding: .5rem 1rem; cursor: pointer; }
+.tabs button.active { border-color: #ff4b4b; color: #ff4b4b; }
+footer { color: #808495; font-size: .875rem; margin-top: 3rem; }
+'''
+
+# Draws each chart the first time it is visible, so charts in a hidden tab
+# get the width of the page rather than zero.
+LOADER = '''
+function draw(pane) {
+  pane.querySelectorAll('.chart:not([data-drawn])').forEach(function (el) {
+    if (!el.offsetParent) return;
+    var spec = JSON.parse(el.nextElementSibling.textContent);
+    Plotly.newPlot(el, spec.data, spec.layout, Object.assign({responsive: true, displaylogo: false}, spec.config));
+    el.dataset.drawn = '1';
+  });
+}
+document.querySelectorAll('.tabs').forEach(function (tabs) {
+  var buttons = tabs.querySelectorAll(':scope > nav button'), panes = tabs.querySelectorAll(':scope > section');
+  buttons.forEach(function (button, i) {
+    button.addEventListener('click', function () {
+      buttons.forEach(function (b, j) { b.classList.toggle('active', i === j); });
+      panes.forEach(function (p, j) { p.hidden = i !== j; });
+      draw(panes[i]);
+    });
+  });
+});
+document.querySelectorAll('details').forEach(function (d) {
+  d.addEventListener('toggle', function () { draw(d); });
+});
+draw(document);
+'''
+
+
+# -- markdown ----------------------------------------------------------------
+# st.write() text is markdown. The page only uses paragraphs, "- " lists,
+# bold, italics, links and backslash escapes, so that is all this handles.
+
+_ESCAPE = re.compile(r'\\([\\`*_{}\[\]()#+\-.!$|])')
+_LINK = re.compile(r'\[([^\]]+)\]\(([^)\s]+)\)')
+_AUTOLINK = re.compile(r'https?://[^\s)<]+')
+_BOLD = re.compile(r'\*\*(.+?)\*\*', re.S)
+_ITALIC = re.compile(r'(?<![\w*])_(.+?)_(?!\w)|(?<![\w*])\*(?!\*)(.+?)\*(?!\w)', re.S)
+_ITEM = re.compile(r'^\s*[-*]\s+')
+
+
+def inline(text):
+    held = []
+
+    def hold(markup):
+        held.append(markup)
+        return f'\x00{len(held) - 1}\x00'
+
+    text = _ESCAPE.sub(lambda m: hold(html.escape(m.group(1))), text)
+    text = html.escape(text)
+    text = _LINK.sub(lambda m: hold(f'<a href="{m.group(2)}">{inline(html.unescape(m.group(1)))}</a>'), text)
+    text = _AUTOLINK.sub(lambda m: hold(f'<a href="{m.group(0)}">{m.group(0)}</a>'), text)
+    text = _BOLD.sub(r'<strong>\1</strong>', text)
+    text = _ITALIC.sub(lambda m: f'<em>{m.group(1) or m.group(2)}</em>', text)
+    while '\x00' in text:
+        text = re.sub('\x00(\\d+)\x00', lambda m: held[int(m.group(1))], text)
+    return text
+
+
+def markdown(text):
+    out, items = [], []
+
+    def end_list():
+        if items:
+            out.append('<ul>' + ''.join(f'<li>{inline(item)}</li>' for item in items) + '</ul>')
+            items.clear()
+
+    for block in re.split(r'\n\s*\n', text.strip()):
+        lines = block.strip('\n').split('\n')
+        # A list may start partway through a paragraph's lines.
+        first = next((i for i, line in enumerate(lines) if _ITEM.match(line)), len(lines))
+        if first:
+            end_list()
+            paragraph = '\n'.join(lines[:first]).strip()
+            out.append(f'<p>{inline(paragraph)}</p>')
+        for line in lines[first:]:
+            if _ITEM.match(line):
+                items.append(_ITEM.sub('', line))
+            else:
+                items[-1] += '\n' + line.strip()
+    end_list()
+    return '\n'.join(out)
+
+
+# -- page --------------------------------------------------------------------
+
+class Bundle:
+    """Files written beside index.html, each under a name that changes with its content."""
+
+    def __init__(self, out):
+        self.out = out
+
+    def write(self, name, data):
+        path = os.path.join(self.out, name)
+        if not os.path.exists(path):
+            atomic.write(path, data)
+        return name
+
+    def image(self, content, mimetype):
+        import assets
+
+        # The page's images are PNG variants from assets.py; offer the WebP
+        # one beside them.
+        for path, widths in assets.VARIANTS.items():
+            for width in widths:
+                if content == assets.image(path, width):
+                    png = os.path.basename(assets.variant_path(path, width))
+                    webp = os.path.basename(assets.variant_path(path, width, 'WEBP'))
+                    return (f'<picture><source type="image/webp" srcset="{self.write(webp, assets.image(path, width, "WEBP"))}">'
+                            f'<img src="{self.write(png, content)}" alt=""></picture>')
+        ext = mimetype.split('/')[-1]
+        name = self.write(f'image.{hashlib.sha1(content).hexdigest()[:12]}.{ext}', content)
+        return f'<img src="{name}" alt="">'
+
+
+def _json_script(obj):
+    # JSON inside <script> must not be able to close the tag.
+    return '<script type="application/json">' + json.dumps(obj).replace('</', '<\\/') + '</script>'
+
+
+def to_html(node, bundle, media):
+    """HTML for one node of an AppTest element tree."""
+    kind = node.type
+    if kind in ('title', 'header', 'subheader'):
+        return f'<{node.proto.tag}>{inline(node.value)}</{node.proto.tag}>'
+    if kind == 'markdown':
+        return markdown(node.value)
+    if kind == 'info':
+        return f'<div class="info">{html.escape(node.icon)} {inline(node.value)}</div>'
+    if kind == 'metric':
+        return (f'<div class="metric"><div class="label">{inline(node.label)}</div>'
+                f'<div class="value">{html.escape(node.value)}</div></div>')
+    if kind == 'plotly_chart':
+        spec = json.loads(node.proto.spec)
+        spec['config'] = json.loads(node.proto.config or '{}')
+        return '<div class="chart"></div>' + _json_script(spec)
+    if kind == 'image':
+        return ''.join(bundle.image(*media[img.url.rsplit('/', 1)[-1].split('.')[0]]) for img in node.proto.imgs)
+    if kind == 'expander':
+        return f'<details><summary>{inline(node.label)}</summary>{children_html(node, bundle, media)}</details>'
+    if kind == 'flex_container':
+        return f'<div class="row">{children_html(node, bundle, media)}</div>'
+    if kind == 'column':
+        return f'<div style="flex: {node.weight:g}">{children_html(node, bundle, media)}</div>'
+    # Buttons, radios and the like have nothing to show in a static page.
+    return ''
+
+
+def children_html(node, bundle, media):
+    return '\n'.join(to_html(child, bundle, media) for child in node.children.values())
+
+
+def checked(at):
+    """`at` after a run, or the page's exception if the run raised one."""
+    if at.exception:
+        raise RuntimeError(at.exception[0].value)
+    return at
+
+
+def run_page():
+    """Run home.py with every lazy section open, once per balance tab.
+
+    Returns {tab label: main block} and the images Streamlit stored,
+    as {file id: (bytes, mimetype)}.
+    """
+    from streamlit.runtime.memory_media_file_storage import MemoryMediaFileStorage
+    from streamlit.testing.v1 import AppTest
+
+    import metrics
+    import scheduler
+
+    scheduler.MODE = 'off'  # this process only reads; the app or worker refreshes
+    # The page's metrics.start() would try to bind the port (or share the
+    # textfile) of the server that launched this export.
+    metrics.PORT, metrics.FILE = 0, None
+    media = {}
+    load = MemoryMediaFileStorage.load_and_get_id
+
+    def keep(self, path_or_data, mimetype, kind, filename=None):
+        file_id = load(self, path_or_data, mimetype, kind, filename)
+        media[file_id] = (self.get_file(file_id).content, mimetype)
+        return file_id
+
+    MemoryMediaFileStorage.load_and_get_id = keep
+    try:
+        at = checked(AppTest.from_file(PAGE, default_timeout=600).run())
+        while at.button:
+            checked(at.button[0].click().run())
+        pages = {}
+        for label in at.radio(key=TAB_KEY).options:
+            pages[label] = checked(at.radio(key=TAB_KEY).set_value(label).run()).main
+    finally:
+        MemoryMediaFileStorage.load_and_get_id = load
+    return pages, media
+
+
+def render(pages, bundle, media):
+    """The page body: the first tab's run, with the tab section swapped for
+    a static tab strip holding every tab's content."""
+    runs = {label: list(main.children.values()) for label, main in pages.items()}
+    first = next(iter(runs.values()))
+    tab = next(i for i, node in enumerate(first) if node.type == 'radio' and node.key == TAB_KEY)
+
+    def tab_body(nodes):
+        # A tab's content runs from the radio to the next top-level header.
+        end = next((i for i in range(tab + 1, len(nodes)) if nodes[i].type == 'header'), len(nodes))
+        return nodes[tab + 1:end], end
+
+    parts = [to_html(node, bundle, media) for node in first[:tab]]
+    nav, panes = [], []
+    for i, (label, nodes) in enumerate(runs.items()):
+        body, end = tab_body(nodes)
+        nav.append(f'<button{" class=active" if i == 0 else ""}>{html.escape(label)}</button>')
+        panes.append(f'<section{"" if i == 0 else " hidden"}>'
+                     + '\n'.join(to_html(node, bundle, media) for node in body) + '</section>')
+    parts.append('<div class="tabs"><nav>' + ''.join(nav) + '</nav>' + ''.join(panes) + '</div>')
+    parts += [to_html(node, bundle, media) for node in first[tab_body(first)[1]:]]
+    return '\n'.join(parts)
+
+
+def export(out):
+    import plotly
+    import plotly.offline
+
+    import assets
+
+    os.makedirs(out, exist_ok=True)
+    bundle = Bundle(out)
+    pages, media = run_page()
+    body = render(pages, bundle, media)
+    plotly_js = bundle.write(f'plotly-{plotly.__version__}.min.js', plotly.offline.get_plotlyjs())
+    icon = bundle.write(os.path.basename(assets.variant_path(assets.ICON, 64)), assets.image(assets.ICON, 64))
+    title = next(iter(pages.values())).children[0].value
+    exported = dt.datetime.now(dt.timezone.utc).strftime('%Y-%m-%d %H:%M UTC')
+    page = f'''<!doctype html>
+<html lang="en">
+<head>
+<meta charset="utf-8">
+<meta name="viewport" content="width=device-width, initial-scale=1">
+<title>{html.escape(title)}</title>
+<link rel="icon" href="{icon}">
+<style>{CSS}</style>
+</head>
+<body>
+<main>
+{body}
+<footer>Static snapshot exported {exported}.</footer>
+</main>
+<script src="{plotly_js}"></script>
+<script>{LOADER}</script>
+</body>
+</html>
+'''
+    atomic.write(os.path.join(out, 'index.html'), page)
+    return os.path.join(out, 'index.html')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Export the dashboard as a static HTML bundle.')
+    parser.add_argument('out', help='output directory')
+    args = parser.parse_args(argv)
+    print(export(os.path.abspath(args.out)))
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,60 @@
+import hashlib
+import threading
+from collections import OrderedDict
+
+import pandas as pd
+
+import metrics
+
+# Finished figures, least recently used first. Bounded so a long-running
+# server holds at most a few copies of each chart, however many sessions
+# and data refreshes it sees.
+MAX_FIGURES = 64
+
+_figures = OrderedDict()
+_lock = threading.Lock()
+
+
+def content_hash(df):
+    """Hash of a DataFrame's columns, dtypes and values."""
+    h = hashlib.sha1(repr(list(zip(df.columns, map(str, df.dtypes)))).encode())
+    h.update(pd.util.hash_pandas_object(df, index=False).to_numpy().tobytes())
+    return h.hexdigest()
+
+
+def figure(spec, df, build, name=None):
+    """`build(df)`, memoized on (spec, content of df).
+
+    `spec` must identify everything about the chart other than its data.
+    Returned figures are shared between sessions and must not be modified.
+    `name` labels the chart in metrics; it defaults to `spec`.
+    """
+    with metrics.span('chart', name=name or spec) as s:
+        s.set(rows=len(df))
+        key = (spec, content_hash(df))
+        with _lock:
+            fig = _figures.get(key)
+            if fig is not None:
+                _figures.move_to_end(key)
+                s.set(cache='hit')
+                return fig
+        s.set(cache='miss')
+        fig = build(df)
+        with _lock:
+            _figures[key] = fig
+            while len(_figures) > MAX_FIGURES:
+                _figures.popitem(last=False)
+        return fig
+
+
+def px_figure(kind, df, layout=None, **kwargs):
+    """Memoized `px.<kind>(df, **kwargs).update_layout(**layout)`."""
+    layout = layout or {}
+    spec = (kind, repr(sorted(kwargs.items())), repr(sorted(layout.items())))
+
+    def build(df):
+        # Imported here so processes that never build a chart don't pay for it.
+        import plotly.express as px
+        return getattr(px, kind)(df, **kwargs).update_layout(**layout)
+
+    return figure(spec, df, build, name=kwargs.get('title', kind))
@@ -0,0 +1,193 @@
+import hashlib
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+import engine
+import incremental
+import metrics
+import schema
+import snapshots
+from cache import TTLCache
+
+API_URL = os.environ.get('FLIPSIDE_API_URL', 'https://node-api.flipsidecrypto.com/api/v2/queries/{}/data/latest')
+
+# Render purely from on-disk snapshots, never touching the network:
+#   streamlit run home.py -- --offline
+OFFLINE = '--offline' in sys.argv or os.environ.get('FLIPSIDE_OFFLINE') == '1'
+
+# Every Flipside query the dashboard reads, by the name the page uses for it.
+QUERIES = {
+    'active_wallets': 'f5eca31b-1f20-4907-b41d-e4638df6c916',
+    'wallets_over_time': 'a14ce172-5b41-43f5-92bc-178725dbc79f',
+    'balance': '58bc9b5d-c1fe-491b-840d-078b17e92dae',
+    'balance_usd': 'f20a4bd2-ffd0-4aa5-93a5-89233835c2a9',
+    'top_wallets_liquid': 'cab246a6-1525-48ed-a967-f5f300b463a3',
+    'top_wallets_locked_liquid': '9957f6c8-b88c-4088-9ccc-b298168437d7',
+    'top_wallets_staked': 'b4df9c17-bcf8-4d11-8609-bb651f23c268',
+    'top_wallets_superfluid': '5270c4df-e1ab-4ff3-b158-3bf6d9ceb1c8',
+    'osmo_balance_usd': 'bf955846-da84-40df-a6f5-ba0c966e43da',
+    'osmo_balance_usd_time': 'dad15a19-42e6-4b4a-9909-e9b1f9aff6bd',
+    'osmo_wallets': '17cc440c-6e4f-491e-a928-472690328be5',
+    'avg_osmo_per_wallet': 'dbf0c2ed-dabe-4de8-8ade-b13f8a6872b4',
+    'holding_osmo_other': 'd895db51-1613-4608-89b2-4b0f56649766',
+    'top_tokens_wallets': '28f0ef75-6dea-441e-b110-420acd9a3bec',
+    'top_tokens_balance': '8268ae93-7fe0-4a8c-9522-dcd400158952',
+    'top_pools_locked_liquid': 'c0e8a857-0577-4fa6-93f2-d55971c8f861',
+    'top_pools_superfluid_staked': 'bb7314d1-7f25-4460-824c-6e554be3d7c3',
+}
+NAMES = {query_id: name for name, query_id in QUERIES.items()}
+
+# Per-request budget: (connect, read) timeout in seconds and retries on
+# connection errors / 5xx. Bounded so one slow query can't hold the page.
+TIMEOUT = (5, 30)
+RETRIES = 2
+# One worker and one pooled connection per unique query, so a full load
+# takes as long as its slowest query rather than several rounds of them.
+MAX_WORKERS = len(set(QUERIES.values()))
+
+# Flipside re-runs the queries every 12 hours, so there is no point asking
+# more often than that.
+CACHE_TTL = float(os.environ.get('FLIPSIDE_CACHE_TTL', 12 * 60 * 60))
+
+_session = None
+# Snapshots loaded at startup keep the age they had on disk, so a restart
+# doesn't reset the clock. Offline there is nothing to refresh from.
+_cache = TTLCache(CACHE_TTL, timestamp=lambda df: None if OFFLINE else df.attrs.get('fetched_at'))
+_pool = ThreadPoolExecutor(max_workers=MAX_WORKERS, thread_name_prefix='flipside')
+
+
+def session():
+    """Shared keep-alive session, pooled wide enough for a full parallel load."""
+    global _session
+    if _session is None:
+        retry = Retry(total=RETRIES, backoff_factor=0.5, status_forcelist=(429, 500, 502, 503, 504),
+                      allowed_methods=('GET',))
+        adapter = HTTPAdapter(pool_connections=1, pool_maxsize=MAX_WORKERS, max_retries=retry)
+        s = requests.Session()
+        s.mount('https://', adapter)
+        s.mount('http://', adapter)
+        s.headers['Accept-Encoding'] = 'gzip, deflate'
+        _session = s
+    return _session
+
+
+def read_snapshot(query_id):
+    # Snapshots written before a schema change still come back typed.
+    return schema.apply(NAMES[query_id], snapshots.read(query_id))
+
+
+def fetch(query_id):
+    """Download a query result, reusing the local snapshot if it hasn't changed.
+
+    Sends the snapshot's ETag/Last-Modified as a conditional request and skips
+    JSON parsing when the server answers 304 or the body hashes the same. With
+    ENGINE_EXTRACT_DIR set the result is computed locally instead (engine.py).
+    """
+    with metrics.span('fetch', name=NAMES[query_id], uuid=query_id) as s:
+        df = _fetch(query_id)
+        s.set(rows=len(df), nbytes=df.attrs.get('bytes', 0), result=df.attrs.get('result', ''))
+    return df
+
+
+def _fetch(query_id):
+    if engine.EXTRACT_DIR:
+        df = engine.get().dataset(NAMES[query_id])
+        df.attrs.update(fetched_at=time.time(), rows=len(df), result='engine')
+        return df
+    meta = snapshots.read_meta(query_id) or {}
+    headers = {}
+    if meta.get('etag'):
+        headers['If-None-Match'] = meta['etag']
+    if meta.get('last_modified'):
+        headers['If-Modified-Since'] = meta['last_modified']
+    resp = session().get(API_URL.format(query_id), headers=headers, timeout=TIMEOUT)
+    resp.raise_for_status()
+    now = time.time()
+    content_hash = None if resp.status_code == 304 else hashlib.sha256(resp.content).hexdigest()
+    if resp.status_code == 304 or content_hash == meta.get('content_hash'):
+        # Record the check on disk too, so a restarted process (or a page
+        # with the scheduler off) sees the snapshot as fresh.
+        checked = {'fetched_at': now}
+        if resp.headers.get('ETag'):
+            checked['etag'] = resp.headers['ETag']
+        if resp.headers.get('Last-Modified'):
+            checked['last_modified'] = resp.headers['Last-Modified']
+        snapshots.touch(query_id, checked)
+        df = read_snapshot(query_id)
+        df.attrs.update(fetched_at=now, bytes=len(resp.content),
+                        result='not_modified' if resp.status_code == 304 else 'unchanged')
+        return df
+    meta = {
+        'fetched_at': now,
+        'content_hash': content_hash,
+        'etag': resp.headers.get('ETag'),
+        'last_modified': resp.headers.get('Last-Modified'),
+    }
+    name = NAMES[query_id]
+    if name in incremental.SERIES:
+        df = incremental.ingest(name, query_id, resp.text, meta)
+    else:
+        df = schema.parse(name, resp.text)
+        snapshots.write(query_id, df, meta)
+        df.attrs.update(meta, rows=len(df))
+    df.attrs.update(bytes=len(resp.content), result='updated')
+    return df
+
+
+def load_query(query_id, stale=False):
+    """Cache loader: the on-disk snapshot while it is fresh, else fetch().
+
+    With `stale` (a cold cache) or offline, any snapshot on disk is returned
+    however old it is, for the cache to serve while it revalidates.
+    """
+    if engine.EXTRACT_DIR:
+        return fetch(query_id)
+    meta = snapshots.read_meta(query_id)
+    if meta is not None and (stale or OFFLINE or time.time() - meta['fetched_at'] < CACHE_TTL):
+        return read_snapshot(query_id)
+    if OFFLINE:
+        raise FileNotFoundError(f'offline and no snapshot for query {query_id} in {snapshots.SNAPSHOT_DIR}')
+    return fetch(query_id)
+
+
+def cached_fetch(query_id):
+    with metrics.span('load', name=NAMES[query_id], uuid=query_id) as s:
+        # A miss is a load run by this caller; a stale entry is refreshed on
+        # another thread and still counts as a hit here.
+        caller, loaders = threading.get_ident(), []
+
+        def loader():
+            loaders.append(threading.get_ident())
+            # On a miss any snapshot will do, so a restart never waits on (or
+            # fails with) upstream; run on another thread this is the
+            # background revalidation, which has to fetch.
+            return load_query(query_id, stale=threading.get_ident() == caller)
+
+        df = _cache.get(query_id, loader)
+        missed = caller in loaders
+        if missed and not OFFLINE and time.time() - df.attrs.get('fetched_at', 0) >= CACHE_TTL:
+            _cache.get(query_id, loader)  # served an old snapshot: revalidate it now
+        s.set(rows=len(df), nbytes=df.attrs.get('bytes', 0) if missed else 0, cache='miss' if missed else 'hit')
+    return df
+
+
+def refresh(query_id):
+    """Re-fetch a query now and publish it to the cache the page reads from."""
+    return _cache.refresh(query_id, lambda: fetch(query_id))
+
+
+def prefetch(names):
+    """Start loading the named datasets in the background; returns name -> Future.
+
+    Each unique query ID is requested once, even if several names share it,
+    and served from the process-wide cache while it is fresh.
+    """
+    futures = {qid: _pool.submit(cached_fetch, qid) for qid in {QUERIES[name] for name in names}}
+    return {name: futures[QUERIES[name]] for name in names}
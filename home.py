@@ -1,19 +1,17 @@
 import datetime as dt
-from email.mime import image
 import streamlit as st
-from PIL import Image
-import pandas as pd
-import plotly.express as px
-import plotly.graph_objects as go
-import plotly.subplots as sp
-from dateutil import parser
+
+import assets
+import metrics
 
 theme_plotly = None
 
-st.set_page_config(page_title='Osmosis - Analysis on Wallet Balances', page_icon= 'Images/osmo-logo.png', layout='wide')
+metrics.start()
+
+st.set_page_config(page_title='Osmosis - Analysis on Wallet Balances', page_icon=assets.image(assets.ICON, 64), layout='wide')
 st.title('The Impact of Liquidity/Staked Wallet Balances on OSMO')
 
-st.image(Image.open('Images/OSMO-blockchain.png'))
+st.image(assets.image(assets.BANNER, 1460), output_format='PNG')
 
 st.subheader('What is Osmosis?')
 st.write(
@@ -94,25 +92,48 @@ with st.expander("**Method details and data sources**"):
         """
     )
 
+# Everything above is text and cached images, so on a cold start it paints
+# while pandas, pyarrow and the data modules are still being imported.
+# Plotly is imported later still, by the first chart that is built.
+import pandas as pd  # noqa: E402
+
+import downsample  # noqa: E402
+import figures  # noqa: E402
+import scheduler  # noqa: E402
+import schema  # noqa: E402
+import sections  # noqa: E402
+
+scheduler.start()
+
+# Daily charts send at most downsample.MAX_POINTS points per trace; narrowing
+# the date range brings back full resolution.
+OSMOSIS_LAUNCH = dt.date(2021, 6, 1)
+date_range = st.sidebar.date_input('Date range for the daily charts', value=(OSMOSIS_LAUNCH, dt.date.today()),
+                                   min_value=OSMOSIS_LAUNCH, max_value=dt.date.today())
+
+
+def daily(df, x, y, by=None, stacked=False):
+    """Rows of a daily series inside the sidebar date range, thinned for the browser."""
+    if len(date_range) == 2:
+        days = pd.to_datetime(df[x])
+        df = df[(days >= pd.Timestamp(date_range[0])) & (days < pd.Timestamp(date_range[1]) + pd.Timedelta(days=1))]
+    return downsample.downsample(df, x, y, by, stacked=stacked)
+
+
 st.header("Overall Metrics by Liquidity & Staking")
-tab2, tab1 = st.tabs(
-        [
-            "**Liquidity**",
-            "**Staking**"
-        ]
-    )
 
-with tab2:
-    active_wallets = pd.read_json('https://node-api.flipsidecrypto.com/api/v2/queries/f5eca31b-1f20-4907-b41d-e4638df6c916/data/latest')
+
+def liquidity(data):
+    active_wallets = data['active_wallets']
     c1, c2 = st.columns([1,1])
     with c1:
         st.metric(label='**Number of Active Wallets participated in Liquidity**', value=str(active_wallets['NO_OF_WALLETS'].values[0]))
     with c2:
         st.metric(label='**Number of Active Wallets Locked their Liquidity**', value=str(active_wallets['NO_OF_WALLETS'].values[1]))
-    wallets_over_time = pd.read_json('https://node-api.flipsidecrypto.com/api/v2/queries/a14ce172-5b41-43f5-92bc-178725dbc79f/data/latest')
-    df = wallets_over_time.query("(BALANCE_TYPE=='liquid') | (BALANCE_TYPE=='locked liquidity')")
-    fig = px.line(df, title='Number of Active Wallets participated in Liquidity & Locked their Liquidity on Daily basis', x=df['DATE'], y=df['NO_OF_WALLETS'], color='BALANCE_TYPE')
-    fig.update_layout(legend_title=None, xaxis_title='Day', yaxis_title='Active Wallets')
+    wallets_over_time = data['wallets_over_time']
+    df = daily(schema.select(wallets_over_time, 'BALANCE_TYPE', 'liquid', 'locked liquidity'), 'DATE', 'NO_OF_WALLETS', 'BALANCE_TYPE')
+    fig = figures.px_figure('line', df, title='Number of Active Wallets participated in Liquidity & Locked their Liquidity on Daily basis', x='DATE', y='NO_OF_WALLETS', color='BALANCE_TYPE',
+                            layout=dict(legend_title=None, xaxis_title='Day', yaxis_title='Active Wallets'))
     st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
 
     st.write(
@@ -128,14 +149,14 @@ with tab2:
         """
     )
 
-    balance = pd.read_json('https://node-api.flipsidecrypto.com/api/v2/queries/58bc9b5d-c1fe-491b-840d-078b17e92dae/data/latest')
-    df = balance.query("(BALANCE_TYPE=='liquid')")
+    balance = data['balance']
+    df = schema.select(balance, 'BALANCE_TYPE', 'liquid')
     st.metric(label='**Total Liquidity Balance (in $)**', value=str(df['BALANCE_USD'].values[0]))
 
-    balance_usd = pd.read_json('https://node-api.flipsidecrypto.com/api/v2/queries/f20a4bd2-ffd0-4aa5-93a5-89233835c2a9/data/latest')
-    df=balance_usd.query("(BALANCE_TYPE=='liquid')")
-    fig = px.area(df, title='Total Balance of Liquidity over Time (in USD)', x=df['DAY'], y=df['BALANCE_USD'])
-    fig.update_layout(legend_title=None, xaxis_title='Day', yaxis_title='Balance (in $)')
+    balance_usd = data['balance_usd']
+    df = daily(schema.select(balance_usd, 'BALANCE_TYPE', 'liquid'), 'DAY', 'BALANCE_USD')
+    fig = figures.px_figure('area', df, title='Total Balance of Liquidity over Time (in USD)', x='DAY', y='BALANCE_USD',
+                            layout=dict(legend_title=None, xaxis_title='Day', yaxis_title='Balance (in $)'))
     st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
 
     st.write(
@@ -150,14 +171,14 @@ with tab2:
 
     c1, c2 = st.columns([1,1])
     with c1:
-        top_wallets = pd.read_json('https://node-api.flipsidecrypto.com/api/v2/queries/cab246a6-1525-48ed-a967-f5f300b463a3/data/latest')
-        fig = px.pie(top_wallets, values='BALANCE_USD', names='ADDRESS', title='Top Wallets with high Liquidity Balance (in USD)')
-        fig.update_layout(showlegend= True)
+        top_wallets = data['top_wallets_liquid']
+        fig = figures.px_figure('pie', top_wallets, values='BALANCE_USD', names='ADDRESS', title='Top Wallets with high Liquidity Balance (in USD)',
+                                layout=dict(showlegend=True))
         st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
     with c2:
-        top_wallets = pd.read_json('https://node-api.flipsidecrypto.com/api/v2/queries/9957f6c8-b88c-4088-9ccc-b298168437d7/data/latest')
-        fig = px.pie(top_wallets, values='BALANCE', names='ADDRESS', title='Top Wallets with high Locked Liquidity Balance (in USD)')
-        fig.update_layout(showlegend= True)
+        top_wallets = data['top_wallets_locked_liquid']
+        fig = figures.px_figure('pie', top_wallets, values='BALANCE', names='ADDRESS', title='Top Wallets with high Locked Liquidity Balance (in USD)',
+                                layout=dict(showlegend=True))
         st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
 
     st.write(
@@ -168,18 +189,19 @@ with tab2:
         """
     )
 
-with tab1:
-    active_wallets = pd.read_json('https://node-api.flipsidecrypto.com/api/v2/queries/f5eca31b-1f20-4907-b41d-e4638df6c916/data/latest')
+
+def staking(data):
+    active_wallets = data['active_wallets']
     c1, c2 = st.columns([1,1])
     with c1:
         st.metric(label='**Number of Active Wallets participated in Staking**', value=str(active_wallets['NO_OF_WALLETS'].values[2]))
     with c2:
         st.metric(label='**Number of Active Wallets participated in Superfluid Staking**', value=str(active_wallets['NO_OF_WALLETS'].values[3]))
     
-    wallets_over_time = pd.read_json('https://node-api.flipsidecrypto.com/api/v2/queries/a14ce172-5b41-43f5-92bc-178725dbc79f/data/latest')
-    df = wallets_over_time.query("(BALANCE_TYPE=='staked') | (BALANCE_TYPE=='superfluid staked')")
-    fig = px.line(df, title='Number of Active Wallets participated in Staking & Superfluid Staking on Daily basis', x=df['DATE'], y=df['NO_OF_WALLETS'], color='BALANCE_TYPE')
-    fig.update_layout(legend_title=None, xaxis_title='Day', yaxis_title='Active Wallets')
+    wallets_over_time = data['wallets_over_time']
+    df = daily(schema.select(wallets_over_time, 'BALANCE_TYPE', 'staked', 'superfluid staked'), 'DATE', 'NO_OF_WALLETS', 'BALANCE_TYPE')
+    fig = figures.px_figure('line', df, title='Number of Active Wallets participated in Staking & Superfluid Staking on Daily basis', x='DATE', y='NO_OF_WALLETS', color='BALANCE_TYPE',
+                            layout=dict(legend_title=None, xaxis_title='Day', yaxis_title='Active Wallets'))
     st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
 
     st.write(
@@ -194,14 +216,14 @@ with tab1:
         """
     )
 
-    balance = pd.read_json('https://node-api.flipsidecrypto.com/api/v2/queries/58bc9b5d-c1fe-491b-840d-078b17e92dae/data/latest')
-    df = balance.query("(BALANCE_TYPE=='staked')")
+    balance = data['balance']
+    df = schema.select(balance, 'BALANCE_TYPE', 'staked')
     st.metric(label='**Total Staked Balance (in $)**', value=str(df['BALANCE_USD'].values[0]))
 
-    balance_usd = pd.read_json('https://node-api.flipsidecrypto.com/api/v2/queries/f20a4bd2-ffd0-4aa5-93a5-89233835c2a9/data/latest')
-    df=balance_usd.query("(BALANCE_TYPE=='staked')")
-    fig = px.area(df, title='Total Balance of Staked Tokens over Time (in USD)', x=df['DAY'], y=df['BALANCE_USD'])
-    fig.update_layout(legend_title=None, xaxis_title='Day', yaxis_title='Balance (in $)')
+    balance_usd = data['balance_usd']
+    df = daily(schema.select(balance_usd, 'BALANCE_TYPE', 'staked'), 'DAY', 'BALANCE_USD')
+    fig = figures.px_figure('area', df, title='Total Balance of Staked Tokens over Time (in USD)', x='DAY', y='BALANCE_USD',
+                            layout=dict(legend_title=None, xaxis_title='Day', yaxis_title='Balance (in $)'))
     st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
 
     st.write(
@@ -216,15 +238,15 @@ with tab1:
 
     c1, c2 = st.columns([1,1])
     with c1:
-        top_wallets = pd.read_json('https://node-api.flipsidecrypto.com/api/v2/queries/b4df9c17-bcf8-4d11-8609-bb651f23c268/data/latest')
-        fig = px.pie(top_wallets, values='BALANCE_USD', names='ADDRESS', title='Top Wallets with high Staked Balance (in USD)')
-        fig.update_layout(showlegend= True)
+        top_wallets = data['top_wallets_staked']
+        fig = figures.px_figure('pie', top_wallets, values='BALANCE_USD', names='ADDRESS', title='Top Wallets with high Staked Balance (in USD)',
+                                layout=dict(showlegend=True))
         st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
 
     with c2:
-        top_wallets_superfluid = pd.read_json('https://node-api.flipsidecrypto.com/api/v2/queries/5270c4df-e1ab-4ff3-b158-3bf6d9ceb1c8/data/latest')
-        fig = px.pie(top_wallets_superfluid, values='BALANCE', names='ADDRESS', title='Top Wallets with high Superfluid Staked Balance (in USD)')
-        fig.update_layout(showlegend= True)
+        top_wallets_superfluid = data['top_wallets_superfluid']
+        fig = figures.px_figure('pie', top_wallets_superfluid, values='BALANCE', names='ADDRESS', title='Top Wallets with high Superfluid Staked Balance (in USD)',
+                                layout=dict(showlegend=True))
         st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
     
     st.write(
@@ -235,6 +257,15 @@ with tab1:
         """
     )
 
+
+tab = sections.tabs(['Liquidity', 'Staking'], key='balance-tab')
+if tab == 'Liquidity':
+    sections.render(liquidity, ['active_wallets', 'wallets_over_time', 'balance', 'balance_usd',
+                                'top_wallets_liquid', 'top_wallets_locked_liquid'])
+else:
+    sections.render(staking, ['active_wallets', 'wallets_over_time', 'balance', 'balance_usd',
+                              'top_wallets_staked', 'top_wallets_superfluid'])
+
 st.header('How the token OSMO affected?')
 st.write(
     """
@@ -247,78 +278,105 @@ st.write(
     """
 )
 
-c1, c2 = st.columns([1,2])
-with c1:
-    osmo_balance_usd = pd.read_json('https://node-api.flipsidecrypto.com/api/v2/queries/bf955846-da84-40df-a6f5-ba0c966e43da/data/latest')
-    fig = px.pie(osmo_balance_usd, values='BALANCE_USD', names='BALANCE_TYPE', title='Total Liquidity Balance vs Staked Balance (in $)')
-    fig.update_layout(showlegend= True)
-    st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
-with c2:
-    osmo_balance_usd_time = pd.read_json('https://node-api.flipsidecrypto.com/api/v2/queries/dad15a19-42e6-4b4a-9909-e9b1f9aff6bd/data/latest')
-    fig = px.area(osmo_balance_usd_time, title='Total Liquidity Balance vs Staked Balance over Time (in $)', x=osmo_balance_usd_time['DATE'], y=osmo_balance_usd_time['BALANCE_USD'], color='BALANCE_TYPE')
-    fig.update_layout(legend_title=None, xaxis_title='Day', yaxis_title='Balance (in $)')
+
+def avg_osmo_per_wallet_figure(avg_osmo_per_wallet):
+    import plotly.express as px
+    import plotly.graph_objects as go
+
+    fig = px.line(avg_osmo_per_wallet, x="DATE", y="TOTAL_WALLETS", title="Average OSMO per Wallet vs The Wallets Growth", log_y=True)
+    fig.add_trace(go.Bar(x=avg_osmo_per_wallet["DATE"], y=avg_osmo_per_wallet["AVG_OSMO_PER_WALLET"]))
+    fig.update_layout(showlegend=False, legend_title=None, xaxis_title='DATE', yaxis_title='Avg OSMO/Wallet vs No of Wallets')
+    return fig
+
+
+def osmo(data):
+    c1, c2 = st.columns([1,2])
+    with c1:
+        osmo_balance_usd = data['osmo_balance_usd']
+        fig = figures.px_figure('pie', osmo_balance_usd, values='BALANCE_USD', names='BALANCE_TYPE', title='Total Liquidity Balance vs Staked Balance (in $)',
+                                layout=dict(showlegend=True))
+        st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
+    with c2:
+        osmo_balance_usd_time = daily(data['osmo_balance_usd_time'], 'DATE', 'BALANCE_USD', 'BALANCE_TYPE', stacked=True)
+        fig = figures.px_figure('area', osmo_balance_usd_time, title='Total Liquidity Balance vs Staked Balance over Time (in $)', x='DATE', y='BALANCE_USD', color='BALANCE_TYPE',
+                                layout=dict(legend_title=None, xaxis_title='Day', yaxis_title='Balance (in $)'))
+        st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
+
+    c1,c2,c3 = st.columns([1,1,1])
+    osmo_wallets = data['osmo_wallets']
+    with c1:
+        st.metric(label='**Number of Wallets LPing/Staking OSMO**', value=str(osmo_wallets['TOTAL_WALLETS'].values[0]))
+    with c2:
+        st.metric(label='**Total OSMO Balance by LPing/Staking**', value=str(osmo_wallets['TOTAL_OSMO_BALANCE'].values[0]))
+    with c3:
+        st.metric(label='**Average OSMO per Wallet**', value=str(osmo_wallets['AVG_OSMO_PER_WALLET'].values[0]))
+
+    avg_osmo_per_wallet = daily(data['avg_osmo_per_wallet'], 'DATE', ['TOTAL_WALLETS', 'AVG_OSMO_PER_WALLET'])
+    fig = figures.figure('avg-osmo-per-wallet', avg_osmo_per_wallet, avg_osmo_per_wallet_figure)
     st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
 
-c1,c2,c3 = st.columns([1,1,1])
-osmo_wallets = pd.read_json('https://node-api.flipsidecrypto.com/api/v2/queries/17cc440c-6e4f-491e-a928-472690328be5/data/latest')
-with c1:
-    st.metric(label='**Number of Wallets LPing/Staking OSMO**', value=str(osmo_wallets['TOTAL_WALLETS'].values[0]))
-with c2:
-    st.metric(label='**Total OSMO Balance by LPing/Staking**', value=str(osmo_wallets['TOTAL_OSMO_BALANCE'].values[0]))
-with c3:
-    st.metric(label='**Average OSMO per Wallet**', value=str(osmo_wallets['AVG_OSMO_PER_WALLET'].values[0]))
+    holding_osmo_other = daily(data['holding_osmo_other'], 'DATE', ['AVG_BALANCE_OSMO', 'AVG_BALANCE_OTHER'])
+    fig = figures.px_figure('area', holding_osmo_other, title='Average Balance of Lping/Staking OSMO vs Other Tokens', x='DATE', y=['AVG_BALANCE_OSMO','AVG_BALANCE_OTHER'],
+                            layout=dict(legend_title=None, xaxis_title='Day', yaxis_title='Balance (in $)'))
+    st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
 
-avg_osmo_per_wallet = pd.read_json('https://node-api.flipsidecrypto.com/api/v2/queries/dbf0c2ed-dabe-4de8-8ade-b13f8a6872b4/data/latest')
-fig = px.line(avg_osmo_per_wallet, x="DATE", y="TOTAL_WALLETS", title="Average OSMO per Wallet vs The Wallets Growth", log_y=True)
-fig.add_trace(go.Bar(x=avg_osmo_per_wallet["DATE"], y=avg_osmo_per_wallet["AVG_OSMO_PER_WALLET"]))
-fig.update_layout(showlegend=False, legend_title=None, xaxis_title='DATE', yaxis_title='Avg OSMO/Wallet vs No of Wallets')
-st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
+    st.write(
+        """
+        From all the above graphs, we can summarize the OSMO variation as 
+        - The Total OSMO Liquidity Balance is very high (which is 76%) compared to the Total Staked OSMO (24%).
+        - The Staking of OSMO started on October 2021 and we see a vary high peak of \$8.6B on October 3rd, 2021 and decreases to \$230M on October 5th. 
+        - From Octobter 5th, we see the constant increase of Staked OSMO Balance to March first week upto \$1B and then the valley starts. From June 2022, it is trending around \$200M.
+        - The Liquidity of OSMO started on December 2021 and see very high growth of Liquid OSMO Balance upto March first week to \$4.3B and then falls to \$316M in step wise upto Mid-June.
+        - From July 2022, the Liquid OSMO Balance is trending around \$500M to \$800M.  
 
-holding_osmo_other = pd.read_json('https://node-api.flipsidecrypto.com/api/v2/queries/d895db51-1613-4608-89b2-4b0f56649766/data/latest')
-fig = px.area(holding_osmo_other, title='Average Balance of Lping/Staking OSMO vs Other Tokens', x="DATE", y=["AVG_BALANCE_OSMO","AVG_BALANCE_OTHER"])
-fig.update_layout(legend_title=None, xaxis_title='Day', yaxis_title='Balance (in $)')
-st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
+        - Total Number of Wallets holding OSMO Balance are 451k with Total OSMO Balance (both Liquid and Staked) as \$726M.
+        - The Average OSMO per Wallet can be calculated as \$1609.
 
-st.write(
-    """
-    From all the above graphs, we can summarize the OSMO variation as 
-    - The Total OSMO Liquidity Balance is very high (which is 76%) compared to the Total Staked OSMO (24%).
-    - The Staking of OSMO started on October 2021 and we see a vary high peak of \$8.6B on October 3rd, 2021 and decreases to \$230M on October 5th. 
-    - From Octobter 5th, we see the constant increase of Staked OSMO Balance to March first week upto \$1B and then the valley starts. From June 2022, it is trending around \$200M.
-    - The Liquidity of OSMO started on December 2021 and see very high growth of Liquid OSMO Balance upto March first week to \$4.3B and then falls to \$316M in step wise upto Mid-June.
-    - From July 2022, the Liquid OSMO Balance is trending around \$500M to \$800M.  
+        """
+    )
 
-    - Total Number of Wallets holding OSMO Balance are 451k with Total OSMO Balance (both Liquid and Staked) as \$726M.
-    - The Average OSMO per Wallet can be calculated as \$1609.
 
-    """
-)
+sections.render(osmo, ['osmo_balance_usd', 'osmo_balance_usd_time', 'osmo_wallets', 'avg_osmo_per_wallet',
+                       'holding_osmo_other'], lazy=True, label='Load OSMO token metrics')
 
 st.subheader('Top Tokens Lping/Staking by most Wallets and with the most Balances')
-c1, c2 = st.columns([1,1])
-with c1:
-    top_tokens_wallets = pd.read_json('https://node-api.flipsidecrypto.com/api/v2/queries/28f0ef75-6dea-441e-b110-420acd9a3bec/data/latest')
-    fig = px.pie(top_tokens_wallets, values='WALLETS', names='PROJECT_NAME', title='Top Tokens that Lping/Staking by most of the Wallets')
-    fig.update_layout(showlegend= True)
-    st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
-with c2:
-    top_tokens_wallets = pd.read_json('https://node-api.flipsidecrypto.com/api/v2/queries/8268ae93-7fe0-4a8c-9522-dcd400158952/data/latest')
-    fig = px.pie(top_tokens_wallets, values='BALANCE_USD', names='PROJECT_NAME', title='Top Tokens that hold the most Liquidity/Staked Balance')
-    fig.update_layout(showlegend= True)
-    st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
+
+
+def top_tokens(data):
+    c1, c2 = st.columns([1,1])
+    with c1:
+        top_tokens_wallets = data['top_tokens_wallets']
+        fig = figures.px_figure('pie', top_tokens_wallets, values='WALLETS', names='PROJECT_NAME', title='Top Tokens that Lping/Staking by most of the Wallets',
+                                layout=dict(showlegend=True))
+        st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
+    with c2:
+        top_tokens_wallets = data['top_tokens_balance']
+        fig = figures.px_figure('pie', top_tokens_wallets, values='BALANCE_USD', names='PROJECT_NAME', title='Top Tokens that hold the most Liquidity/Staked Balance',
+                                layout=dict(showlegend=True))
+        st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
+
+
+sections.render(top_tokens, ['top_tokens_wallets', 'top_tokens_balance'], lazy=True, label='Load top tokens')
 
 st.subheader('Top Pools with most Locked Liquidity & Superfluid Staked Balances')
-c1, c2 = st.columns([1,1])
-with c1:
-    top_pools_locked_liquid = pd.read_json('https://node-api.flipsidecrypto.com/api/v2/queries/c0e8a857-0577-4fa6-93f2-d55971c8f861/data/latest')
-    fig = px.pie(top_pools_locked_liquid, values='BALANCE', names='POOL_ID', title='Top Pools with the most Locked Liquidity Balance')
-    fig.update_layout(showlegend= True)
-    st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
-with c2:
-    top_pools_superfluid_staked = pd.read_json('https://node-api.flipsidecrypto.com/api/v2/queries/bb7314d1-7f25-4460-824c-6e554be3d7c3/data/latest')
-    fig = px.pie(top_pools_superfluid_staked, values='BALANCE', names='POOL_ID', title='Top Pools with the most Superfluid Staked Balance')
-    fig.update_layout(showlegend= True)
-    st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
+
+
+def top_pools(data):
+    c1, c2 = st.columns([1,1])
+    with c1:
+        top_pools_locked_liquid = data['top_pools_locked_liquid']
+        fig = figures.px_figure('pie', top_pools_locked_liquid, values='BALANCE', names='POOL_ID', title='Top Pools with the most Locked Liquidity Balance',
+                                layout=dict(showlegend=True))
+        st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
+    with c2:
+        top_pools_superfluid_staked = data['top_pools_superfluid_staked']
+        fig = figures.px_figure('pie', top_pools_superfluid_staked, values='BALANCE', names='POOL_ID', title='Top Pools with the most Superfluid Staked Balance',
+                                layout=dict(showlegend=True))
+        st.plotly_chart(fig, use_container_width=True, theme=theme_plotly)
+
+
+sections.render(top_pools, ['top_pools_locked_liquid', 'top_pools_superfluid_staked'], lazy=True,
+                label='Load top pools')
 
 st.header('Conclusion')
 st.write(
@@ -354,3 +412,9 @@ st.write(
     
 )
 
+# Hidden panel: with metrics enabled, open the page with ?perf=1.
+if metrics.ENABLED and st.query_params.get('perf') == '1':
+    with st.sidebar.expander('Performance', expanded=True):
+        st.caption('Per data load, chart build and section since the server started.')
+        st.dataframe(pd.DataFrame(metrics.summary()), hide_index=True)
+
@@ -0,0 +1,162 @@
+"""Incremental ingestion for the daily time-series queries.
+
+Only the last day or two of a daily series change between refreshes, so
+instead of re-parsing and re-writing the whole history every time we keep
+it in the snapshot store and merge in just the rows at or after the stored
+high-water mark (less a small overlap for days Flipside is still filling
+in). The recent rows live in a small tail snapshot that is rewritten on
+each refresh; the history file beside it is only rewritten when the tail
+is rolled into it, or on the periodic full rebuild that picks up any
+upstream corrections to older days.
+"""
+import json
+import time
+
+import pandas as pd
+
+import schema
+import snapshots
+
+# name -> (date column, other columns that identify a row)
+SERIES = {
+    'wallets_over_time': ('DATE', ['BALANCE_TYPE']),
+    'balance_usd': ('DAY', ['BALANCE_TYPE']),
+    'osmo_balance_usd_time': ('DATE', ['BALANCE_TYPE']),
+    'avg_osmo_per_wallet': ('DATE', []),
+    'holding_osmo_other': ('DATE', []),
+}
+
+OVERLAP_DAYS = 2      # re-take the newest days, which upstream may still revise
+TAIL_DAYS = 30        # roll the tail into history once it covers more than this
+REBUILD_DAYS = 7      # re-ingest the full result this often
+
+
+def ingest(name, query_id, text, meta):
+    """Merge a freshly downloaded result for series `name` into its snapshot.
+
+    `meta` is the fetch metadata for the new result; returns the full
+    series with it in `attrs`.
+    """
+    date, keys = SERIES[name]
+    stored = snapshots.read_meta(query_id) or {}
+    now = time.time()
+    hwm = stored.get('high_water_mark')
+    if hwm is None or now - stored.get('rebuilt_at', 0) > REBUILD_DAYS * 24 * 60 * 60:
+        df = schema.parse(name, text)
+        history, tail = _cut(df, date, df[date].max() - pd.Timedelta(days=TAIL_DAYS))
+        rebuilt_at = now
+    else:
+        since = pd.Timestamp(hwm) - pd.Timedelta(days=OVERLAP_DAYS)
+        new = _parse_since(name, text, date, since)
+        tail = snapshots.read(query_id, history=False)
+        tail = schema.apply(name, pd.concat([tail, new], ignore_index=True))
+        tail = tail.drop_duplicates([date] + keys, keep='last').sort_values(date, kind='stable')
+        history = None
+        if tail[date].max() - tail[date].min() > pd.Timedelta(days=2 * TAIL_DAYS):
+            older, tail = _cut(tail, date, tail[date].max() - pd.Timedelta(days=TAIL_DAYS))
+            history = pd.concat([snapshots.read_history(query_id), older], ignore_index=True)
+        rebuilt_at = stored['rebuilt_at']
+
+    newest = tail[date].max()
+    meta = dict(meta, high_water_mark=None if pd.isna(newest) else newest.isoformat(), rebuilt_at=rebuilt_at)
+    snapshots.write(query_id, tail, meta, history=history)
+    df = schema.apply(name, snapshots.read(query_id))
+    df.attrs.update(meta)
+    return df
+
+
+def _cut(df, date, cutoff):
+    return df[df[date] < cutoff], df[df[date] >= cutoff]
+
+
+def _parse_since(name, text, date, since):
+    # Flipside dates are ISO strings, so a string comparison on the date
+    # prefix is enough to filter them.
+    since = since.strftime('%Y-%m-%d')
+    try:
+        rows = _rows_since(text, date, since)
+    except (ValueError, IndexError, KeyError, TypeError):
+        rows = [row for row in json.loads(text) if row[date][:10] >= since]
+    return schema.apply(name, pd.DataFrame(rows))
+
+
+_decoder = json.JSONDecoder()
+
+
+def _rows_since(text, date, since):
+    """Rows dated on or after `since`, decoded from the newest end of the body.
+
+    The series come back as a JSON list of flat rows in date order, oldest
+    or newest first. Decoding one row at a time from whichever end is
+    newest and stopping at the first older row keeps the work in step with
+    the new rows rather than the whole history. Raises ValueError for a
+    body that isn't such a list, for the caller to decode it in full.
+    """
+    start = text.index('[') + 1
+    end = text.rindex(']')
+    if text[:start - 1].strip() or text[end + 1:].strip():
+        raise ValueError('not a JSON list')
+    forward = _rows_forward(text, start, end)
+    first = next(forward, None)
+    if first is None:
+        return []
+    backward = _rows_backward(text, start, end)
+    last = next(backward)
+    if first[date] > last[date]:
+        rows, newer = [first], forward
+    else:
+        rows, newer = [last], backward
+    if rows[0][date][:10] < since:
+        return []
+    for row in newer:
+        if row[date][:10] < since:
+            break
+        rows.append(row)
+    return rows if newer is forward else rows[::-1]
+
+
+def _rows_forward(text, start, end):
+    pos = start
+    while True:
+        while text[pos].isspace():
+            pos += 1
+        if pos >= end:
+            return
+        row, pos = _decoder.raw_decode(text, pos)
+        while text[pos].isspace():
+            pos += 1
+        if text[pos] == ',':
+            pos += 1
+        elif pos != end:
+            raise ValueError(f'unexpected {text[pos]!r} at {pos}')
+        yield row
+
+
+def _rows_backward(text, start, end):
+    pos = end
+    while True:
+        while pos > start and text[pos - 1].isspace():
+            pos -= 1
+        if pos <= start:
+            return
+        if text[pos - 1] != '}':
+            raise ValueError(f'unexpected {text[pos - 1]!r} at {pos - 1}')
+        # Rows are flat objects, so a row starts at the last '{' before its
+        # end unless that brace is inside a string; then try the one before.
+        brace = pos
+        while True:
+            brace = text.rindex('{', start, brace)
+            try:
+                row, stop = _decoder.raw_decode(text, brace)
+            except ValueError:
+                continue
+            if stop == pos:
+                break
+        pos = brace
+        while pos > start and text[pos - 1].isspace():
+            pos -= 1
+        if pos > start:
+            if text[pos - 1] != ',':
+                raise ValueError(f'unexpected {text[pos - 1]!r} at {pos - 1}')
+            pos -= 1
+        yield row
@@ -0,0 +1,232 @@
+"""Timing spans around the page's data loads, chart builds and sections.
+
+Off by default, in which case span() hands back one shared no-op object
+and costs a function call. Turn it on with any of
+
+    FLIPSIDE_METRICS=1              # collect; view in the sidebar with ?perf=1
+    FLIPSIDE_METRICS_PORT=9108      # also serve Prometheus text on :9108/metrics
+    FLIPSIDE_METRICS_FILE=path.prom # also rewrite this file every INTERVAL seconds
+
+Durations are kept as Prometheus-style cumulative histograms, one per
+label set (kind, name, hit/miss, ...), so memory stays constant however
+long the process runs.
+"""
+import bisect
+import os
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import atomic
+
+PORT = int(os.environ.get('FLIPSIDE_METRICS_PORT', 0))
+FILE = os.environ.get('FLIPSIDE_METRICS_FILE')
+ENABLED = bool(PORT or FILE or os.environ.get('FLIPSIDE_METRICS') == '1')
+INTERVAL = float(os.environ.get('FLIPSIDE_METRICS_INTERVAL', 15))
+PREFIX = 'osmo_dashboard'
+
+# Upper bounds in seconds; a cache hit lands in the first bucket, a cold
+# fetch of a big series somewhere past 1s.
+BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30)
+
+_series = {}   # (kind, labels) -> Series
+_lock = threading.Lock()
+_started = False
+
+
+class Series:
+    """One histogram of durations plus running totals of rows and bytes."""
+
+    def __init__(self):
+        self.counts = [0] * (len(BUCKETS) + 1)  # the last bucket is +Inf
+        self.count = 0
+        self.sum = 0.0
+        self.rows = 0
+        self.bytes = 0
+
+    def observe(self, seconds, rows, nbytes):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        self.rows += rows
+        self.bytes += nbytes
+
+    def quantile(self, q):
+        """Estimate from the buckets, interpolating linearly inside one."""
+        rank = q * self.count
+        seen = 0
+        for i, n in enumerate(self.counts):
+            if n and seen + n >= rank:
+                low = BUCKETS[i - 1] if i else 0.0
+                high = BUCKETS[i] if i < len(BUCKETS) else BUCKETS[-1]
+                return low + (high - low) * (rank - seen) / n
+            seen += n
+        return 0.0
+
+
+class Span:
+    __slots__ = ('kind', 'labels', 'rows', 'bytes', 'start')
+
+    def __init__(self, kind, labels):
+        self.kind = kind
+        self.labels = labels
+        self.rows = 0
+        self.bytes = 0
+
+    def set(self, rows=None, nbytes=None, **labels):
+        """Attach what is only known once the work is done (rows, bytes, cache=hit/miss)."""
+        if rows is not None:
+            self.rows = rows
+        if nbytes is not None:
+            self.bytes = nbytes
+        self.labels.update(labels)
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        elapsed = time.perf_counter() - self.start
+        if exc[0] is not None:
+            self.labels['error'] = exc[0].__name__
+        key = (self.kind, tuple(sorted(self.labels.items())))
+        with _lock:
+            series = _series.get(key)
+            if series is None:
+                series = _series[key] = Series()
+            series.observe(elapsed, self.rows, self.bytes)
+
+
+class _NullSpan:
+    __slots__ = ()
+
+    def set(self, rows=None, nbytes=None, **labels):
+        pass
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        pass
+
+
+_NULL = _NullSpan()
+
+
+def span(kind, **labels):
+    """Time a block as one `kind` ('load', 'chart', 'section') observation.
+
+        with metrics.span('load', name=name, uuid=query_id) as s:
+            df = ...
+            s.set(rows=len(df), cache='miss')
+    """
+    if not ENABLED:
+        return _NULL
+    return Span(kind, labels)
+
+
+def snapshot():
+    """A copy of every series, as {(kind, labels): Series}."""
+    with _lock:
+        out = {}
+        for key, series in _series.items():
+            copy = out[key] = Series()
+            copy.__dict__.update(series.__dict__, counts=list(series.counts))
+        return out
+
+
+def reset():
+    with _lock:
+        _series.clear()
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels(labels, **extra):
+    items = list(labels) + list(extra.items())
+    return '{' + ','.join(f'{k}="{_escape(v)}"' for k, v in items) + '}'
+
+
+def prometheus():
+    """Every series in the Prometheus text exposition format."""
+    by_kind = {}
+    for (kind, labels), series in sorted(snapshot().items()):
+        by_kind.setdefault(kind, []).append((labels, series))
+    lines = []
+    for kind, entries in by_kind.items():
+        name = f'{PREFIX}_{kind}_seconds'
+        lines += [f'# HELP {name} Wall time of one {kind}.', f'# TYPE {name} histogram']
+        for labels, series in entries:
+            cumulative = 0
+            for bound, n in zip(BUCKETS + ('+Inf',), series.counts):
+                cumulative += n
+                lines.append(f'{name}_bucket{_labels(labels, le=bound)} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {series.sum:.6f}')
+            lines.append(f'{name}_count{_labels(labels)} {series.count}')
+        for total in ('rows', 'bytes'):
+            if any(getattr(series, total) for _, series in entries):
+                name = f'{PREFIX}_{kind}_{total}_total'
+                lines += [f'# HELP {name} {total.capitalize()} handled by {kind}s.', f'# TYPE {name} counter']
+                lines += [f'{name}{_labels(labels)} {getattr(series, total)}' for labels, series in entries]
+    return '\n'.join(lines) + '\n'
+
+
+def summary():
+    """One row per series for the sidebar panel, slowest p95 first."""
+    rows = []
+    for (kind, labels), series in snapshot().items():
+        labels = dict(labels)
+        rows.append({
+            'kind': kind,
+            'name': labels.pop('name', ''),
+            # hit/miss for loads and charts, what the server said for fetches
+            'outcome': labels.pop('cache', labels.pop('result', '')),
+            'count': series.count,
+            'mean ms': 1000 * series.sum / series.count,
+            'p95 ms': 1000 * series.quantile(0.95),
+            'rows': series.rows,
+            'bytes': series.bytes,
+        })
+    return sorted(rows, key=lambda row: -row['p95 ms'])
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = prometheus().encode()
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+def write_file(path=None):
+    atomic.write(path or FILE, prometheus())
+
+
+def _write_forever():
+    while True:
+        time.sleep(INTERVAL)
+        write_file()
+
+
+def start():
+    """Start the metrics endpoint and/or file writer once per process, if configured."""
+    global _started
+    with _lock:
+        if _started or not (PORT or FILE):
+            return
+        _started = True
+    if PORT:
+        server = ThreadingHTTPServer(('', PORT), _Handler)
+        threading.Thread(target=server.serve_forever, name='metrics-http', daemon=True).start()
+    if FILE:
+        threading.Thread(target=_write_forever, name='metrics-file', daemon=True).start()
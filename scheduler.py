@@ -0,0 +1,169 @@
+"""Background refresh of every dataset the dashboard reads.
+
+Runs either as a daemon thread inside the Streamlit process (see start()) or
+as its own worker that only keeps the on-disk snapshots fresh:
+
+    python scheduler.py            # refresh forever
+    python scheduler.py --once     # refresh everything once and exit
+    python scheduler.py --status   # print per-dataset status
+
+With FLIPSIDE_EXPORT_DIR set, every round that finds new data also
+re-exports the static HTML page there (see export.py).
+"""
+import argparse
+import json
+import os
+import random
+import subprocess
+import sys
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import atomic
+import flipside
+import snapshots
+
+INTERVAL = float(os.environ.get('FLIPSIDE_REFRESH_INTERVAL', flipside.CACHE_TTL))
+# Refreshes run up to this fraction of INTERVAL early, so replicas don't
+# refresh in lockstep and a refresh never lands after the page's cache
+# entry (same TTL) has already expired.
+JITTER = 0.05
+BACKOFF = 60           # first retry delay after a failure, doubled per consecutive failure
+STATUS_FILE = os.path.join(snapshots.SNAPSHOT_DIR, 'status.json')
+# 'thread' runs the scheduler inside the Streamlit process; set to 'off' when
+# a separate `python scheduler.py` worker keeps the snapshots fresh instead.
+MODE = os.environ.get('FLIPSIDE_SCHEDULER', 'thread')
+EXPORT_DIR = os.environ.get('FLIPSIDE_EXPORT_DIR')
+
+_thread = None
+_thread_lock = threading.Lock()
+
+
+class Scheduler(threading.Thread):
+    def __init__(self, interval=INTERVAL, jitter=JITTER, backoff=BACKOFF):
+        super().__init__(name='flipside-scheduler', daemon=True)
+        self.interval = interval
+        self.jitter = jitter
+        self.backoff = backoff
+        self.stopped = threading.Event()
+        self.status = {}
+        for qid, name in flipside.NAMES.items():
+            meta = snapshots.read_meta(qid) or {}
+            last_success = meta.get('fetched_at')
+            self.status[qid] = {
+                'name': name,
+                'last_success': last_success,
+                'last_attempt': None,
+                'duration': None,
+                'bytes': None,
+                'rows': meta.get('rows'),
+                'failures': 0,
+                'last_error': None,
+                'result': None,  # what the last refresh found: updated, unchanged, ...
+                # Datasets with a fresh snapshot are due just before it ages out.
+                'next_run': last_success + self.delay() if last_success else 0,
+            }
+
+    def delay(self):
+        # Only ever early; see JITTER.
+        return self.interval * (1 - random.uniform(0, self.jitter))
+
+    def run(self):
+        with ThreadPoolExecutor(max_workers=flipside.MAX_WORKERS) as pool:
+            while not self.stopped.is_set():
+                self.run_once(pool)
+                wake = min(s['next_run'] for s in self.status.values())
+                self.stopped.wait(max(wake - time.time(), 1))
+
+    def run_once(self, pool, force=False):
+        now = time.time()
+        due = [qid for qid, s in self.status.items() if force or s['next_run'] <= now]
+        list(pool.map(self.refresh, due))
+        if due:
+            write_status(self.status)
+        # Only re-render when some dataset actually has new data.
+        if EXPORT_DIR and any(self.status[qid]['result'] in ('updated', 'engine') for qid in due):
+            self.export()
+
+    def refresh(self, query_id):
+        status = self.status[query_id]
+        start = time.time()
+        status['last_attempt'] = start
+        try:
+            df = flipside.refresh(query_id)
+        except Exception as exc:
+            status['failures'] += 1
+            status['last_error'] = repr(exc)
+            status['result'] = None
+            delay = min(self.backoff * 2 ** (status['failures'] - 1), self.interval)
+        else:
+            status.update(last_success=df.attrs['fetched_at'], bytes=df.attrs.get('bytes'), rows=len(df),
+                          failures=0, last_error=None, result=df.attrs.get('result'))
+            delay = self.delay()
+        status['duration'] = time.time() - start
+        status['next_run'] = time.time() + delay
+
+    def export(self):
+        # In its own process: export.py runs the page under AppTest, which
+        # must not share a process with a live Streamlit server.
+        script = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'export.py')
+        result = subprocess.run([sys.executable, script, EXPORT_DIR], capture_output=True, text=True)
+        if result.returncode:
+            print(f'static export to {EXPORT_DIR} failed:\n{result.stderr}', file=sys.stderr)
+
+    def stop(self):
+        self.stopped.set()
+
+
+def start():
+    """Start the in-process scheduler once per process; returns it, or None when disabled."""
+    global _thread
+    if MODE != 'thread' or flipside.OFFLINE:
+        return None
+    with _thread_lock:
+        if _thread is None:
+            _thread = Scheduler()
+            _thread.start()
+    return _thread
+
+
+def write_status(status):
+    atomic.write(STATUS_FILE, json.dumps(status, indent=2))
+
+
+def read_status():
+    try:
+        with open(STATUS_FILE) as f:
+            return json.load(f)
+    except FileNotFoundError:
+        return {}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Keep the dashboard datasets fresh.')
+    parser.add_argument('--once', action='store_true', help='refresh every dataset once and exit')
+    parser.add_argument('--status', action='store_true', help='print per-dataset status and exit')
+    args = parser.parse_args(argv)
+
+    if args.status:
+        fmt = '{:<28} {:>20} {:>9} {:>10} {:>8}  {}'
+        print(fmt.format('dataset', 'last success', 'duration', 'bytes', 'failures', 'last error'))
+        for s in read_status().values():
+            last = time.strftime('%Y-%m-%d %H:%M:%S', time.localtime(s['last_success'])) if s['last_success'] else '-'
+            duration = '{:.2f}s'.format(s['duration']) if s['duration'] is not None else '-'
+            print(fmt.format(s['name'], last, duration, s['bytes'] if s['bytes'] is not None else '-',
+                             s['failures'], s['last_error'] or ''))
+        return 0
+
+    scheduler = Scheduler()
+    if args.once:
+        with ThreadPoolExecutor(max_workers=flipside.MAX_WORKERS) as pool:
+            scheduler.run_once(pool, force=True)
+        return 1 if any(s['failures'] for s in scheduler.status.values()) else 0
+    scheduler.run()
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,84 @@
+import io
+import threading
+import weakref
+
+import numpy as np
+import pandas as pd
+
+# Declared column types for each query, by the name in flipside.QUERIES:
+#   date      parsed to datetime64 once, at ingestion
+#   category  low-cardinality labels
+#   int       integer, downcast to the smallest type that fits
+#   float32   series values that only feed charts
+# Columns not listed (and float64 values shown verbatim in st.metric) keep
+# the type pandas infers.
+SCHEMAS = {
+    'active_wallets': {'BALANCE_TYPE': 'category', 'NO_OF_WALLETS': 'int'},
+    'wallets_over_time': {'DATE': 'date', 'BALANCE_TYPE': 'category', 'NO_OF_WALLETS': 'int'},
+    'balance': {'BALANCE_TYPE': 'category'},
+    'balance_usd': {'DAY': 'date', 'BALANCE_TYPE': 'category', 'BALANCE_USD': 'float32'},
+    'osmo_balance_usd': {'BALANCE_TYPE': 'category'},
+    'osmo_balance_usd_time': {'DATE': 'date', 'BALANCE_TYPE': 'category', 'BALANCE_USD': 'float32'},
+    'osmo_wallets': {'TOTAL_WALLETS': 'int'},
+    'avg_osmo_per_wallet': {'DATE': 'date', 'TOTAL_WALLETS': 'int', 'AVG_OSMO_PER_WALLET': 'float32'},
+    'holding_osmo_other': {'DATE': 'date', 'AVG_BALANCE_OSMO': 'float32', 'AVG_BALANCE_OTHER': 'float32'},
+    'top_tokens_wallets': {'WALLETS': 'int'},
+    'top_pools_locked_liquid': {'POOL_ID': 'category'},
+    'top_pools_superfluid_staked': {'POOL_ID': 'category'},
+}
+
+
+def apply(name, df):
+    """Convert the columns of `df` to the types declared for query `name`."""
+    for column, kind in SCHEMAS.get(name, {}).items():
+        if column not in df:
+            continue
+        if kind == 'date':
+            df[column] = pd.to_datetime(df[column])
+        elif kind == 'category':
+            df[column] = df[column].astype('category')
+        elif kind == 'int':
+            df[column] = pd.to_numeric(df[column], downcast='integer')
+        elif kind == 'float32':
+            df[column] = df[column].astype('float32')
+    return df
+
+
+def parse(name, text):
+    """Parse a Flipside JSON result with the schema declared for query `name`."""
+    df = pd.read_json(io.StringIO(text), convert_dates=False, keep_default_dates=False)
+    return apply(name, df)
+
+
+# Partitions of cached frames, computed once per DataFrame (so once per
+# refresh) and dropped when the frame itself is garbage collected.
+_splits = {}
+_splits_lock = threading.Lock()
+
+
+def split(df, column):
+    """dict of value -> positions of the rows of `df` with that value in `column`.
+
+    Positions rather than the rows themselves, so a split frame isn't held
+    in memory twice.
+    """
+    with _splits_lock:
+        by_column = _splits.get(id(df))
+        if by_column is None:
+            by_column = _splits[id(df)] = {}
+            weakref.finalize(df, _splits.pop, id(df), None)
+        positions = by_column.get(column)
+    if positions is None:
+        positions = df.groupby(column, observed=True, sort=False).indices
+        with _splits_lock:
+            by_column[column] = positions
+    return positions
+
+
+def select(df, column, *values):
+    """Rows of `df` whose `column` is one of `values`, without re-filtering on every render."""
+    positions = split(df, column)
+    found = [positions[value] for value in values if value in positions]
+    if not found:
+        return df.iloc[:0]
+    return df.take(found[0] if len(found) == 1 else np.concatenate(found))
@@ -0,0 +1,46 @@
+from collections.abc import Mapping
+
+import streamlit as st
+
+import flipside
+import metrics
+
+
+class Datasets(Mapping):
+    """The datasets a section declared, fetched in the background as soon as
+    the section starts rendering. Indexing waits for just that one dataset, so
+    the first metric paints while the bigger series are still downloading."""
+
+    def __init__(self, names):
+        self._futures = flipside.prefetch(names)
+
+    def __getitem__(self, name):
+        return self._futures[name].result()
+
+    def __iter__(self):
+        return iter(self._futures)
+
+    def __len__(self):
+        return len(self._futures)
+
+
+def render(body, datasets, lazy=False, key=None, label='Load'):
+    """Fetch `datasets` and run `body(data)` to draw one block of the page.
+
+    A lazy section shows only a `label` button until the viewer asks for it,
+    and then stays open for the rest of their session.
+    """
+    if lazy:
+        key = 'section-' + (key or body.__name__)
+        if not st.session_state.get(key):
+            if not st.button(label, key=key + '-button'):
+                return
+            st.session_state[key] = True
+    with metrics.span('section', name=body.__name__):
+        body(Datasets(datasets))
+
+
+def tabs(labels, key):
+    """Like `st.tabs`, but returns the selected label so only that tab's body
+    is run. `st.tabs` runs every tab on every rerun."""
+    return st.radio(key, labels, key=key, horizontal=True, label_visibility='collapsed')
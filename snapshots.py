@@ -0,0 +1,87 @@
+import json
+import os
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import atomic
+
+# One Parquet file per query UUID. The fetch details ride along in the file's
+# schema metadata so a snapshot is self-describing.
+SNAPSHOT_DIR = os.environ.get('FLIPSIDE_SNAPSHOT_DIR',
+                              os.path.join(os.path.dirname(os.path.abspath(__file__)), '.snapshots'))
+META_KEY = b'flipside'
+
+
+def path(query_id):
+    return os.path.join(SNAPSHOT_DIR, query_id + '.parquet')
+
+
+def history_path(query_id):
+    # Older rows of an incrementally ingested series; see incremental.py.
+    return os.path.join(SNAPSHOT_DIR, query_id + '.history.parquet')
+
+
+def write(query_id, df, meta, history=None):
+    """Persist `df` with `meta` (fetched_at, content_hash, etag, ...) atomically.
+
+    For incremental series `df` is only the recent tail; pass `history` to
+    also replace the older rows stored beside it.
+    """
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    if history is not None:
+        _write_table(history_path(query_id), history)
+    rows = len(df)
+    if os.path.exists(history_path(query_id)):
+        rows += pq.read_metadata(history_path(query_id)).num_rows
+    _write_table(path(query_id), df, dict(meta, rows=rows))
+
+
+def touch(query_id, meta):
+    """Merge `meta` into a snapshot's stored metadata without changing its rows,
+    e.g. a new fetched_at and ETag after the server answered 304."""
+    table = pq.read_table(path(query_id))
+    _write_table(path(query_id), table, dict(json.loads(table.schema.metadata[META_KEY]), **meta))
+
+
+def _write_table(dest, df, meta=None):
+    table = df if isinstance(df, pa.Table) else pa.Table.from_pandas(df, preserve_index=False)
+    if meta is not None:
+        table = table.replace_schema_metadata({**(table.schema.metadata or {}), META_KEY: json.dumps(meta).encode()})
+    with atomic.replacing(dest) as tmp:
+        pq.write_table(table, tmp)
+
+
+def read_meta(query_id):
+    """Snapshot metadata without reading any data, or None if there is no snapshot."""
+    try:
+        schema = pq.read_schema(path(query_id), memory_map=True)
+    except FileNotFoundError:
+        return None
+    return json.loads(schema.metadata[META_KEY])
+
+
+def read_history(query_id):
+    """The history rows stored for an incremental series, or None."""
+    try:
+        return pq.read_table(history_path(query_id), memory_map=True).to_pandas()
+    except FileNotFoundError:
+        return None
+
+
+def read(query_id, history=True):
+    """Load a snapshot as a DataFrame with its metadata in `df.attrs`, or None.
+
+    Stored history rows come first unless `history` is False.
+    """
+    try:
+        table = pq.read_table(path(query_id), memory_map=True)
+    except FileNotFoundError:
+        return None
+    df = table.to_pandas()
+    older = read_history(query_id) if history else None
+    if older is not None:
+        df = pd.concat([older, df], ignore_index=True)
+    df.attrs.update(json.loads(table.schema.metadata[META_KEY]))
+    return df
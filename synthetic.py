@@ -0,0 +1,84 @@
+"""Synthetic fact_daily_balances / ez_prices extracts for the local engine.
+
+    python synthetic.py OUT_DIR [--wallets 500000] [--days 400]
+
+writes OUT_DIR/balances.parquet and OUT_DIR/prices.parquet, ready for
+ENGINE_EXTRACT_DIR=OUT_DIR. The defaults are roughly Osmosis's scale.
+"""
+import argparse
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+
+import engine
+
+START = pd.Timestamp('2021-06-19')
+
+
+def generate(wallets=500_000, days=400, tokens=40, pools=60, positions=1.6, span_days=40, seed=0):
+    """Returns (balances, prices) DataFrames.
+
+    Each wallet holds about `positions` (balance type, currency) positions, each
+    held for a random span averaging `span_days`, so the defaults give about
+    30 million rows.
+    """
+    rng = np.random.default_rng(seed)
+    currencies = np.array([engine.OSMO] + [f'ibc/{i:04X}' for i in range(tokens - 1)]
+                          + [f'gamm/pool/{i}' for i in range(1, pools + 1)])
+    n_pos = int(wallets * positions)
+    owner = rng.integers(0, wallets, n_pos)
+    btype = rng.choice(len(engine.BALANCE_TYPES), n_pos, p=[0.45, 0.15, 0.3, 0.1])
+    # Liquid and staked balances are in tokens (OSMO-heavy); locked and
+    # superfluid positions are LP shares of a pool.
+    is_lp = btype % 2 == 1
+    token = np.where(rng.random(n_pos) < 0.5, 0, rng.zipf(1.5, n_pos) % tokens)
+    pool = tokens + rng.zipf(1.3, n_pos) % pools
+    currency = np.where(is_lp, pool, token)
+    start = rng.integers(0, days, n_pos)
+    length = np.minimum(rng.geometric(min(span_days ** -1, 1), n_pos), days - start)
+    size = rng.lognormal(4, 2, n_pos)
+
+    # One row per position per day alive, built without a Python loop.
+    pos = np.repeat(np.arange(n_pos, dtype=np.int32), length)
+    offset = (np.arange(len(pos)) - np.repeat(np.cumsum(length) - length, length)).astype(np.int32)
+    day = start[pos] + offset
+    drift = 1 + 0.002 * offset * rng.standard_normal(len(pos), dtype=np.float32)
+    balances = pd.DataFrame({
+        'DATE': START + pd.to_timedelta(day, unit='D'),
+        'ADDRESS': pd.Categorical.from_codes(owner[pos], [f'osmo1{i:038d}' for i in range(wallets)]),
+        'BALANCE_TYPE': pd.Categorical.from_codes(btype[pos], engine.BALANCE_TYPES),
+        'CURRENCY': pd.Categorical.from_codes(currency[pos], currencies),
+        'BALANCE': (size[pos] * np.abs(drift)).astype(np.float32),
+    })
+
+    # A random walk per token; LP shares are unpriced, as in ez_prices.
+    walk = np.exp(np.cumsum(rng.normal(0, 0.04, (days, tokens)), axis=0)) * rng.lognormal(0, 1.5, tokens)
+    walk[:, 0] *= 5 / walk[0, 0]
+    prices = pd.DataFrame({
+        'DATE': np.repeat(START + pd.to_timedelta(np.arange(days), unit='D'), tokens),
+        'CURRENCY': np.tile(currencies[:tokens], days),
+        'PROJECT_NAME': np.tile(['OSMO'] + [f'TOKEN{i}' for i in range(1, tokens)], days),
+        'PRICE': walk.ravel(),
+    })
+    return balances, prices
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Write synthetic balance and price extracts.')
+    parser.add_argument('out')
+    parser.add_argument('--wallets', type=int, default=500_000)
+    parser.add_argument('--days', type=int, default=400)
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args(argv)
+    balances, prices = generate(args.wallets, args.days, seed=args.seed)
+    os.makedirs(args.out, exist_ok=True)
+    balances.to_parquet(os.path.join(args.out, 'balances.parquet'), index=False)
+    prices.to_parquet(os.path.join(args.out, 'prices.parquet'), index=False)
+    print(f'{len(balances):,} balance rows, {len(prices):,} price rows -> {args.out}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,182 @@
+"""Behaviour checks for the data path: the cache, downsampling and incremental ingestion.
+
+    python -m pytest tests
+"""
+import os
+import sys
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import downsample  # noqa: E402
+import flipside  # noqa: E402
+import incremental  # noqa: E402
+import schema  # noqa: E402
+import snapshots  # noqa: E402
+from cache import TTLCache  # noqa: E402
+
+
+class Loader:
+    """A cache loader that counts its calls and can be held until released."""
+
+    def __init__(self, value, fail=False):
+        self.value = value
+        self.fail = fail
+        self.calls = 0
+        self.release = threading.Event()
+        self.release.set()
+
+    def __call__(self):
+        self.calls += 1
+        self.release.wait(5)
+        if self.fail:
+            raise ConnectionError('upstream down')
+        return self.value
+
+
+def stale_cache(value):
+    """A cache holding `value` already past its TTL."""
+    cache = TTLCache(60, timestamp=lambda v: time.time() - 120)
+    cache.get('k', Loader(value))
+    return cache
+
+
+def wait_idle(cache):
+    deadline = time.time() + 5
+    while cache._inflight and time.time() < deadline:
+        time.sleep(0.01)
+    assert not cache._inflight
+
+
+# -- TTLCache ----------------------------------------------------------------
+
+def test_concurrent_misses_load_once():
+    cache = TTLCache(60)
+    loader = Loader('value')
+    loader.release.clear()
+    results = []
+    threads = [threading.Thread(target=lambda: results.append(cache.get('k', loader))) for _ in range(8)]
+    for t in threads:
+        t.start()
+    time.sleep(0.1)
+    loader.release.set()
+    for t in threads:
+        t.join()
+    assert loader.calls == 1
+    assert results == ['value'] * 8
+
+
+def test_expired_entry_is_served_while_one_refresh_runs():
+    cache = stale_cache('old')
+    loader = Loader('new')
+    loader.release.clear()
+    start = time.perf_counter()
+    assert [cache.get('k', loader) for _ in range(5)] == ['old'] * 5
+    assert time.perf_counter() - start < 0.5
+    loader.release.set()
+    wait_idle(cache)
+    assert loader.calls == 1
+    assert cache.get('k', loader) == 'new'
+
+
+def test_failed_refresh_keeps_the_old_value():
+    cache = stale_cache('old')
+    loader = Loader('new', fail=True)
+    assert cache.get('k', loader) == 'old'
+    wait_idle(cache)
+    assert cache.get('k', loader) == 'old'
+
+
+def test_cold_cache_serves_an_old_snapshot_when_upstream_is_down(tmp_path, monkeypatch):
+    monkeypatch.setattr(snapshots, 'SNAPSHOT_DIR', str(tmp_path))
+    monkeypatch.setattr(flipside, '_cache', TTLCache(flipside.CACHE_TTL, timestamp=lambda df: df.attrs.get('fetched_at')))
+    fetched = threading.Event()
+
+    def fetch(query_id):
+        fetched.set()
+        raise ConnectionError('upstream down')
+
+    monkeypatch.setattr(flipside, 'fetch', fetch)
+    query_id = flipside.QUERIES['osmo_wallets']
+    snapshots.write(query_id, pd.DataFrame({'TOTAL_WALLETS': [5]}), {'fetched_at': time.time() - 2 * flipside.CACHE_TTL})
+    assert flipside.cached_fetch(query_id)['TOTAL_WALLETS'].tolist() == [5]
+    assert fetched.wait(5)  # and it is revalidating in the background
+    wait_idle(flipside._cache)
+    assert flipside.cached_fetch(query_id)['TOTAL_WALLETS'].tolist() == [5]
+
+
+# -- downsampling ------------------------------------------------------------
+
+def daily_frame(days, groups=('liquid', 'staked'), seed=0):
+    rng = np.random.default_rng(seed)
+    dates = pd.date_range('2021-06-01', periods=days)
+    return pd.concat([pd.DataFrame({'DATE': dates, 'BALANCE_TYPE': group, 'BALANCE_USD': rng.random(days)})
+                      for group in groups], ignore_index=True)
+
+
+def test_downsampling_keeps_spikes_and_ends():
+    y = np.random.default_rng(1).random(5000)
+    y[1234], y[4321] = 50.0, -50.0
+    keep = downsample.minmax_mask(y, max_points=1000)
+    assert keep.sum() <= 1000
+    assert keep[[0, 1234, 4321, 4999]].all()
+
+
+def test_small_series_are_kept_whole():
+    assert downsample.minmax_mask(np.arange(10.0), max_points=1000).all()
+
+
+@pytest.mark.parametrize('stacked', [False, True])
+def test_downsampled_traces_stay_within_budget(stacked):
+    out = downsample.downsample(daily_frame(1500), 'DATE', 'BALANCE_USD', 'BALANCE_TYPE', max_points=1000, stacked=stacked)
+    assert out.groupby('BALANCE_TYPE').size().max() <= 1000
+
+
+def test_stacked_traces_share_their_dates():
+    df = daily_frame(1500, groups=('liquid', 'staked', 'superfluid staked'))
+    spike = df.index[(df['BALANCE_TYPE'] == 'staked') & (df['DATE'] == pd.Timestamp('2022-05-13'))]
+    df.loc[spike, 'BALANCE_USD'] = 100.0
+    out = downsample.downsample(df, 'DATE', 'BALANCE_USD', 'BALANCE_TYPE', stacked=True)
+    dates = [tuple(group['DATE']) for _, group in out.groupby('BALANCE_TYPE')]
+    assert len(set(dates)) == 1
+    assert len(dates[0]) < 1500
+    assert out['BALANCE_USD'].max() == 100.0
+
+
+# -- incremental ingestion ---------------------------------------------------
+
+def body(df):
+    return df.to_json(orient='records', date_format='iso')
+
+
+@pytest.mark.parametrize('newest_first', [False, True])
+def test_incremental_merges_equal_a_full_parse(tmp_path, monkeypatch, newest_first):
+    monkeypatch.setattr(snapshots, 'SNAPSHOT_DIR', str(tmp_path))
+    name = 'osmo_balance_usd_time'
+    full = daily_frame(200)
+    full = full.sort_values(['DATE', 'BALANCE_TYPE'], ignore_index=True)
+    # Grow the series a few days at a time, past the point where the tail is
+    # rolled into history, with upstream revising the newest day each time.
+    for days in range(100, 201, 7):
+        result = full[full['DATE'] < full['DATE'].min() + pd.Timedelta(days=days)].copy()
+        result.loc[result.index[-1], 'BALANCE_USD'] = -days
+        if newest_first:
+            result = result.iloc[::-1]
+        text = body(result)
+        merged = incremental.ingest(name, 'series', text, {'fetched_at': time.time()})
+        expected = schema.parse(name, text).sort_values(['DATE', 'BALANCE_TYPE'], ignore_index=True)
+        merged = merged.sort_values(['DATE', 'BALANCE_TYPE'], ignore_index=True)
+        pd.testing.assert_frame_equal(merged, expected, check_categorical=False, check_dtype=False)
+    assert os.path.exists(snapshots.history_path('series'))
+
+
+def test_rows_since_decodes_only_the_new_rows():
+    result = body(daily_frame(1000, groups=('liquid',)))
+    rows = incremental._rows_since(result, 'DATE', '2024-02-20')
+    assert [row['DATE'][:10] for row in rows] == ['2024-02-20', '2024-02-21', '2024-02-22', '2024-02-23', '2024-02-24',
+                                                 '2024-02-25']